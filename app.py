@@ -1,11 +1,50 @@
+import json
 import gradio as gr
 from gradio_calendar import Calendar 
 from datetime import datetime, timedelta
-from utils.wildfire import search_papers_w, on_page_change_w
-from utils.quantum import search_papers_q, on_page_change_q
-from utils.ai import search_papers_ai, on_page_change_ai
-from utils.blockchain import search_papers_b, on_page_change_b
-from utils.all import search_papers_all, on_page_change_all
+from utils import metrics
+from utils.render import CARD_CSS, CARD_JS
+from utils.search import QUERY_WORKERS, all_topics_search, topic_search
+from utils.snapshots import DEFAULT_DAYS
+from utils.topics import TOPICS
+
+
+# (label, tab id, search) per tab, in display order
+TABS = [(t.label, t.tab_id, topic_search(t)) for t in TOPICS] + [('All', 'all', all_topics_search())]
+TAB_IDS = tuple(tab_id for _, tab_id, _ in TABS)
+# Requests waiting beyond this are turned away instead of queueing unboundedly
+QUEUE_SIZE = 64
+
+
+def default_start_date():
+    # Evaluated per page load, so a long-running app keeps the window its landing snapshots use
+    return datetime.now() - timedelta(days=DEFAULT_DAYS)
+
+
+def load_once(search):
+    # Tabs are filled the first time they are shown rather than all at once on
+    # page load; later selections keep whatever the user is looking at
+    async def load(loaded, page_token, start_date, end_date, keywords, author, category):
+        if loaded:
+            return gr.update(), gr.update(), gr.update(), gr.update(), page_token, True
+        return *(await search(start_date, end_date, keywords, author, category)), True
+    return load
+
+
+def load_landing(search, tab_id):
+    load = load_once(search)
+    async def load_if_shown(loaded, page_token, start_date, end_date, keywords, author, category,
+                            request: gr.Request):
+        # A ?tab= deep link to another tab is opened by the js below, whose
+        # click fires that tab's select event instead
+        wanted = request.query_params.get('tab') if request else None
+        if wanted in TAB_IDS and wanted != tab_id:
+            return gr.update(), gr.update(), gr.update(), gr.update(), page_token, False
+        # The calendars' own load events run alongside this one and may not have
+        # replaced the build-time dates yet, so the default window is used directly
+        return await load(loaded, page_token, default_start_date(), datetime.now(), keywords, author, category)
+    return load_if_shown
+
 
 # replace your js string with this:
 js = """
@@ -16,12 +55,7 @@ js = """
     if (!wanted) return;
 
     // map short keys -> actual tab labels shown in the UI
-    const map = {
-      wildfire: "Wildfire prediction and forecasting using Deep learning",
-      quantum_computing: "Quantum Computing",
-      ai: "Artificial Intelligence",
-      web3_blockchain: "Web3 and Blockchain",
-    };
+    const map = """ + json.dumps({t.tab_id: t.label for t in TOPICS}) + """;
 
     const wantedLabel = map[wanted] || wanted;
 
@@ -46,177 +80,76 @@ js = """
 """
 
 
-with gr.Blocks(theme=gr.themes.Soft(primary_hue="purple"), css="footer{display:none !important}") as demo:
-    gr.Markdown("""
-        <link href="https://fonts.googleapis.com/css2?family=Roboto&display=swap" rel="stylesheet">
-        <style>
-            body {
-                font-family: 'Roboto', sans-serif !important;
-            }
-            a {
-                font-family: 'Roboto', sans-serif !important;
-            }
-        </style>
-    
-        <h1 style="text-align:center; color:#6f42c1; margin-bottom: 30px;">Latest Research Trends (ArXiv)</h1>
-        """)
-    
-    with gr.Tab('Wildfire prediction and forecasting using Deep learning', id='wildfire'):
+def topic_tab(label, tab_id, search, landing=False):
+    with gr.Tab(label, id=tab_id) as tab:
         with gr.Row():
-            default_start_date = datetime.now() - timedelta(days=30)
-            default_end_date = datetime.now()
             start_date = Calendar(value=default_start_date, label="📅 Start Date")
-            end_date = Calendar(value=default_end_date, label="📅 End Date")
+            end_date = Calendar(value=datetime.now, label="📅 End Date")
+        keywords = gr.Textbox(label="🔎 Keywords", placeholder="Search titles and summaries (optional)")
+        with gr.Row():
+            author = gr.Textbox(label="👤 Author", placeholder="Exact author name (optional)")
+            category = gr.Textbox(label="🏷️ Category", placeholder="arXiv category, e.g. cs.LG (optional)")
 
         search_btn = gr.Button("🔍 Search Papers", elem_id="search-btn", scale=2)
         status_output = gr.Textbox(label="Status", interactive=False)
         results_output = gr.HTML()
         page_buttons = gr.Radio(choices=[], label="📄 Pages", interactive=True, visible=False)
+        page_token = gr.State(None)
+        loaded = gr.State(False)
 
         search_btn.click(
-            fn=search_papers_w,
-            inputs=[start_date, end_date],
-            outputs=[page_buttons, status_output, results_output, page_buttons]
+            fn=search.search_papers,
+            inputs=[start_date, end_date, keywords, author, category],
+            outputs=[page_buttons, status_output, results_output, page_buttons, page_token]
         )
 
         page_buttons.change(
-            fn=on_page_change_w,
-            inputs=[page_buttons, start_date, end_date],
-            outputs=results_output
+            fn=search.on_page_change,
+            inputs=[page_buttons, start_date, end_date, page_token, keywords, author, category],
+            outputs=[results_output, page_token]
         )
 
-        demo.load(
-        fn=search_papers_w,
-        inputs=[start_date, end_date],
-        outputs=[page_buttons, status_output, results_output, page_buttons],
-        scroll_to_output=False
-    )
-
-    with gr.Tab('Quantum Computing', id='quantum_computing'):    
-        with gr.Row():
-            default_start_date = datetime.now() - timedelta(days=30)
-            default_end_date = datetime.now()
-            start_date = Calendar(value=default_start_date, label="📅 Start Date")
-            end_date = Calendar(value=default_end_date, label="📅 End Date")
-    
-        search_btn = gr.Button("🔍 Search Papers", elem_id="search-btn", scale=2)
-        status_output = gr.Textbox(label="Status", interactive=False)
-        results_output = gr.HTML()
-        page_buttons = gr.Radio(choices=[], label="📄 Pages", interactive=True, visible=False)
-    
-        search_btn.click(
-            fn=search_papers_q,
-            inputs=[start_date, end_date],
-            outputs=[page_buttons, status_output, results_output, page_buttons]
-        )
-    
-        page_buttons.change(
-            fn=on_page_change_q,
-            inputs=[page_buttons, start_date, end_date],
-            outputs=results_output
-        )
-
-        demo.load(
-        fn=search_papers_q,
-        inputs=[start_date, end_date],
-        outputs=[page_buttons, status_output, results_output, page_buttons],
-        scroll_to_output=False
-    )
-
-    with gr.Tab('Artificial Intelligence', id='ai'):    
-        with gr.Row():
-            default_start_date = datetime.now() - timedelta(days=30)
-            default_end_date = datetime.now()
-            start_date = Calendar(value=default_start_date, label="📅 Start Date")
-            end_date = Calendar(value=default_end_date, label="📅 End Date")
-    
-        search_btn = gr.Button("🔍 Search Papers", elem_id="search-btn", scale=2)
-        status_output = gr.Textbox(label="Status", interactive=False)
-        results_output = gr.HTML()
-        page_buttons = gr.Radio(choices=[], label="📄 Pages", interactive=True, visible=False)
-    
-        search_btn.click(
-            fn=search_papers_ai,
-            inputs=[start_date, end_date],
-            outputs=[page_buttons, status_output, results_output, page_buttons]
-        )
-    
-        page_buttons.change(
-            fn=on_page_change_ai,
-            inputs=[page_buttons, start_date, end_date],
-            outputs=results_output
+        tab.select(
+            fn=load_once(search.search_papers),
+            inputs=[loaded, page_token, start_date, end_date, keywords, author, category],
+            outputs=[page_buttons, status_output, results_output, page_buttons, page_token, loaded],
+            scroll_to_output=False
         )
 
-        demo.load(
-        fn=search_papers_ai,
-        inputs=[start_date, end_date],
-        outputs=[page_buttons, status_output, results_output, page_buttons],
-        scroll_to_output=False
-    )
+        # The first tab is filled on page load unless ?tab= opens another one
+        if landing:
+            demo.load(
+                fn=load_landing(search.search_papers, tab_id),
+                inputs=[loaded, page_token, start_date, end_date, keywords, author, category],
+                outputs=[page_buttons, status_output, results_output, page_buttons, page_token, loaded],
+                scroll_to_output=False
+            )
 
-    with gr.Tab('Web3 and Blockchain', id='web3_blockchain'):    
-        with gr.Row():
-            default_start_date = datetime.now() - timedelta(days=30)
-            default_end_date = datetime.now()
-            start_date = Calendar(value=default_start_date, label="📅 Start Date")
-            end_date = Calendar(value=default_end_date, label="📅 End Date")
-    
-        search_btn = gr.Button("🔍 Search Papers", elem_id="search-btn", scale=2)
-        status_output = gr.Textbox(label="Status", interactive=False)
-        results_output = gr.HTML()
-        page_buttons = gr.Radio(choices=[], label="📄 Pages", interactive=True, visible=False)
-    
-        search_btn.click(
-            fn=search_papers_b,
-            inputs=[start_date, end_date],
-            outputs=[page_buttons, status_output, results_output, page_buttons]
-        )
-    
-        page_buttons.change(
-            fn=on_page_change_b,
-            inputs=[page_buttons, start_date, end_date],
-            outputs=results_output
-        )
 
-        demo.load(
-        fn=search_papers_b,
-        inputs=[start_date, end_date],
-        outputs=[page_buttons, status_output, results_output, page_buttons],
-        scroll_to_output=False
-    )
-
-    with gr.Tab('All', id='all'):    
-        with gr.Row():
-            default_start_date = datetime.now() - timedelta(days=30)
-            default_end_date = datetime.now()
-            start_date = Calendar(value=default_start_date, label="📅 Start Date")
-            end_date = Calendar(value=default_end_date, label="📅 End Date")
-    
-        search_btn = gr.Button("🔍 Search Papers", elem_id="search-btn", scale=2)
-        status_output = gr.Textbox(label="Status", interactive=False)
-        results_output = gr.HTML()
-        page_buttons = gr.Radio(choices=[], label="📄 Pages", interactive=True, visible=False)
+with gr.Blocks(theme=gr.themes.Soft(primary_hue="purple"), css="footer{display:none !important}" + CARD_CSS) as demo:
+    gr.Markdown("""
+        <link href="https://fonts.googleapis.com/css2?family=Roboto&display=swap" rel="stylesheet">
+        <style>
+            body {
+                font-family: 'Roboto', sans-serif !important;
+            }
+            a {
+                font-family: 'Roboto', sans-serif !important;
+            }
+        </style>
     
-        search_btn.click(
-            fn=search_papers_all,
-            inputs=[start_date, end_date],
-            outputs=[page_buttons, status_output, results_output, page_buttons]
-        )
+        <h1 style="text-align:center; color:#6f42c1; margin-bottom: 30px;">Latest Research Trends (ArXiv)</h1>
+        """)
     
-        page_buttons.change(
-            fn=on_page_change_all,
-            inputs=[page_buttons, start_date, end_date],
-            outputs=results_output
-        )
-
-        demo.load(
-        fn=search_papers_all,
-        inputs=[start_date, end_date],
-        outputs=[page_buttons, status_output, results_output, page_buttons],
-        scroll_to_output=False
-    )
+    for i, (label, tab_id, search) in enumerate(TABS):
+        topic_tab(label, tab_id, search, landing=i == 0)
 
     demo.load(None, js=js)
+    demo.load(None, js=CARD_JS)
     
 
+# Each event runs at most QUERY_WORKERS at a time, matching the query thread pool
+demo.queue(default_concurrency_limit=QUERY_WORKERS, max_size=QUEUE_SIZE)
+# Prometheus /metrics on PAPER_METRICS_PORT (localhost), only when that is set
+metrics.serve()
 demo.launch(server_port=5001, server_name='0.0.0.0', root_path='/paper_aggregator', share=False)
@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from store_data import COLUMNS, insert_rows, open_database
+from utils.cache import results_cache
+from utils.pagination import PAGE_SIZE
+from utils.search import PaperSearch
+from utils.topics import TOPICS
+
+# Latency benchmark for the search and pagination paths:
+#   python benchmark.py --sizes 1000 100000 1000000 --users 32 --json bench.json
+# Synthetic topic databases are generated once per size under --data-dir through
+# store_data's own insert path (schema, FTS index, cards), then reused.
+
+SIZES = [1_000, 100_000, 1_000_000]
+DATA_DIR = 'bench_data'
+END_DAY = date(2025, 12, 31)
+DAYS = 5 * 365
+RANGE_WIDTHS = [1, 7, 30, 365, DAYS]
+PAGE_DEPTHS = [1, 10, 100]
+REPEAT = 20
+USERS = 32
+PAGES_PER_USER = 3
+GENERATE_CHUNK = 10_000
+# Each topic also holds this share of the next topic's papers, as real topics
+# overlap, so the All tab has duplicates to merge
+SHARED_FRACTION = 0.1
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'qu', 'an', 'el', 'in', 'on', 'ur', 'ex', 'ph']
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in ('', 'n', 'ric')]
+# Zipf-like word frequencies, so full-text hits range from very common to rare
+WEIGHTS = [1 / (i + 1) for i in range(len(WORDS))]
+SEARCH_WORD = WORDS[3]
+
+
+def text(rng, words):
+    return ' '.join(rng.choices(WORDS, WEIGHTS, k=words))
+
+
+def synthetic_paper(n):
+    # Seeded by the paper number, so a paper shared by two topics is identical in both
+    rng = random.Random(n)
+    day = END_DAY - timedelta(days=rng.randrange(DAYS))
+    published = f'{day.isoformat()}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}Z'
+    link = f'http://arxiv.org/abs/{day:%y%m}.{n:07d}v1'
+    return {
+        'id': link,
+        'updated': published,
+        'published': published,
+        'title': text(rng, 8).title(),
+        'summary': text(rng, 150),
+        'authors': ', '.join(text(rng, 2).title() for _ in range(rng.randint(1, 6))),
+        'affiliations': '',
+        'doi': '',
+        'comment': '',
+        'journal_ref': '',
+        'primary_category': 'cs.AI',
+        'categories': 'cs.AI, cs.LG',
+        'link_alternate': link,
+        'link_pdf': link.replace('/abs/', '/pdf/'),
+        'generated_summary': text(rng, 45),
+    }
+
+
+def database_path(data_dir, size, topic):
+    return os.path.join(data_dir, str(size), topic.files.db)
+
+
+def generate(data_dir, size):
+    # `size` papers in total, spread over the topics
+    per_topic = max(size // len(TOPICS), 1)
+    os.makedirs(os.path.join(data_dir, str(size)), exist_ok=True)
+    for k, topic in enumerate(TOPICS):
+        filename = database_path(data_dir, size, topic)
+        if os.path.exists(filename + '.done'):
+            continue
+        if os.path.exists(filename):
+            os.remove(filename)
+        started = time.perf_counter()
+        first = int(k * per_topic * (1 - SHARED_FRACTION))
+        conn = open_database(filename)
+        for chunk_start in range(first, first + per_topic, GENERATE_CHUNK):
+            numbers = range(chunk_start, min(chunk_start + GENERATE_CHUNK, first + per_topic))
+            insert_rows(conn, pd.DataFrame([synthetic_paper(n) for n in numbers], columns=COLUMNS))
+        conn.close()
+        open(filename + '.done', 'w').close()
+        print(f"Generated {per_topic} papers in {filename} ({time.perf_counter() - started:.1f}s)")
+
+
+def percentiles(samples):
+    if len(samples) < 2:
+        samples = samples * 2
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def timed(fn, *args, repeat=REPEAT, **kwargs):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args, **kwargs)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def day_range(width):
+    start = END_DAY - timedelta(days=width - 1)
+    return start.isoformat(), END_DAY.isoformat()
+
+
+def bench_view(search, repeat):
+    # (operation, parameters, samples) for one PaperSearch, all uncached except display_results
+    results = []
+    for width in RANGE_WIDTHS:
+        start, end = day_range(width)
+        results.append(('count_papers', f'{width}d', timed(search.count_papers, start, end, repeat=repeat)))
+        results.append(('query_papers', f'{width}d', timed(search.query_papers, start, end, repeat=repeat)))
+
+    start, end = day_range(DAYS)
+    for depth in PAGE_DEPTHS:
+        offset = (depth - 1) * PAGE_SIZE
+        results.append((
+            'query_papers offset', f'page {depth}',
+            timed(search.query_papers, start, end, limit=PAGE_SIZE, offset=offset, repeat=repeat)
+        ))
+        # Keyset seek from the end of the previous page, as a page token does
+        previous = search.query_papers(start, end, limit=1, offset=max(offset - 1, 0))
+        after = (previous[0].published, previous[0].id) if previous and depth > 1 else None
+        results.append((
+            'query_papers keyset', f'page {depth}',
+            timed(search.query_papers, start, end, limit=PAGE_SIZE, offset=0, after=after, repeat=repeat)
+        ))
+
+    results.append(('render_page', 'page 1', timed(search.render_page, start, end, 1, repeat=repeat)))
+    search.display_results(start, end, 1)
+    results.append(('display_results cached', 'page 1', timed(search.display_results, start, end, 1, repeat=repeat)))
+    results.append(('count_fulltext', SEARCH_WORD, timed(search.count_fulltext, SEARCH_WORD, start, end, repeat=repeat)))
+    results.append(('search_fulltext', SEARCH_WORD, timed(search.search_fulltext, SEARCH_WORD, start, end, repeat=repeat)))
+    return results
+
+
+async def simulated_user(search, rng, latencies):
+    width = rng.choice(RANGE_WIDTHS)
+    end = END_DAY - timedelta(days=rng.randrange(DAYS - width + 1))
+    start = end - timedelta(days=width - 1)
+    keywords = SEARCH_WORD if rng.random() < 0.2 else ''
+
+    started = time.perf_counter()
+    _, _, _, pages, token = await search.search_papers(start, end, keywords)
+    latencies['search_papers'].append(time.perf_counter() - started)
+
+    choices = pages.get('choices') if isinstance(pages, dict) else None
+    for _ in range(PAGES_PER_USER if choices else 0):
+        started = time.perf_counter()
+        _, token = await search.on_page_change(rng.choice(choices), start, end, token, keywords)
+        latencies['on_page_change'].append(time.perf_counter() - started)
+
+
+async def bench_users(searches, users):
+    # Every user picks a tab at random; latencies include time queued for a query worker
+    latencies = {'search_papers': [], 'on_page_change': []}
+    rng = random.Random(users)
+    await asyncio.gather(*(simulated_user(rng.choice(searches), rng, latencies) for _ in range(users)))
+    return latencies
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the search and pagination handlers on synthetic data.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--users', type=int, default=USERS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    records = []
+
+    def report(size, view, operation, parameters, samples):
+        stats = {name: value * 1000 for name, value in percentiles(samples).items()}
+        records.append({'size': size, 'view': view, 'operation': operation, 'parameters': parameters, **stats})
+        print(f"{size:>9} {view:<6} {operation:<24} {parameters:<10} "
+              f"p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms  p99 {stats['p99']:8.2f} ms")
+
+    for size in args.sizes:
+        generate(args.data_dir, size)
+        databases = {topic.name: database_path(args.data_dir, size, topic) for topic in TOPICS}
+        first = TOPICS[0].name
+        searches = [
+            PaperSearch(f'bench-{size}-{first}', {first: databases[first]}),
+            PaperSearch(f'bench-{size}-all', databases, tag_topics=True),
+        ]
+        for search in searches:
+            view = search.name.rsplit('-', 1)[1]
+            for operation, parameters, samples in bench_view(search, args.repeat):
+                report(size, view, operation, parameters, samples)
+
+        results_cache.clear()
+        latencies = asyncio.run(bench_users(searches, args.users))
+        for operation, samples in latencies.items():
+            if samples:
+                report(size, 'users', operation, f'{args.users} users', samples)
+        print(f"{size:>9} peak RSS {peak_rss_mib():.1f} MiB")
+        records.append({'size': size, 'peak_rss_mib': peak_rss_mib()})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(records, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from store_data import TOPICS, save_csv, topic_files
+from utils.intervals import missing_windows
+from utils.paper_index import sync_index
+from utils.search import all_topics_search, tab_searches
+from utils.snapshots import build_snapshots
+
+# Loads several topics at once: python ingest.py wildfire=temp.csv ai=ai.csv
+# With --fetched START END (the window the CSVs were fetched for) that window is
+# recorded in each topic's intervals ledger, and --missing START END prints the
+# parts of a window the ledger does not cover yet, so a refresh fetches only those.
+# Each topic has its own SQLite file, so one process per topic never contends
+# for a write lock and the whole refresh takes as long as the slowest topic.
+
+BACKUP_DIR = 'backups'
+BACKUP_SUFFIX = '.latestbackup'
+
+
+def backup_topic(topic, backup_dir=BACKUP_DIR):
+    files = topic_files(topic)
+    os.makedirs(backup_dir, exist_ok=True)
+
+    # The online backup API copies a consistent snapshot even while the app is reading
+    if os.path.exists(files.db):
+        src = sqlite3.connect(files.db)
+        dst = sqlite3.connect(os.path.join(backup_dir, files.db + BACKUP_SUFFIX))
+        with dst:
+            src.backup(dst)
+        dst.close()
+        src.close()
+
+    for filename in (files.intervals, files.excel):
+        if os.path.exists(filename):
+            shutil.copy2(filename, os.path.join(backup_dir, filename + BACKUP_SUFFIX))
+
+
+def ingest_topic(topic, csv_filename, backup_dir=BACKUP_DIR, fetched=None):
+    # Runs in a worker process; output is captured so topics do not interleave
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        backup_topic(topic, backup_dir)
+        save_csv(csv_filename, topic, fetched=fetched)
+    return log.getvalue()
+
+
+def parse_sources(values):
+    sources = {}
+    for value in values:
+        topic, sep, csv_filename = value.partition('=')
+        if not sep or topic not in TOPICS:
+            raise argparse.ArgumentTypeError(f"expected <topic>=<csv> with topic in {', '.join(TOPICS)}: {value}")
+        sources[topic] = csv_filename
+    return sources
+
+
+def print_missing(topics, start, end):
+    # One "<topic> <start> <end>" line per gap, for the fetch step to request
+    for topic in topics:
+        for gap_start, gap_end in missing_windows(topic_files(topic).intervals, start, end):
+            print(topic, gap_start.isoformat(), gap_end.isoformat())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load fetched arXiv CSVs into the per-topic databases.")
+    parser.add_argument('sources', nargs='+', metavar='TOPIC=CSV')
+    parser.add_argument('--backup-dir', default=BACKUP_DIR)
+    parser.add_argument('--fetched', nargs=2, type=datetime.fromisoformat, metavar=('START', 'END'),
+                        help="window the CSVs were fetched for, e.g. 2025-09-01 2025-09-02")
+    parser.add_argument('--missing', nargs=2, type=datetime.fromisoformat, metavar=('START', 'END'),
+                        help="only print the parts of START..END no fetch has covered for each topic")
+    args = parser.parse_args(argv)
+    if args.missing:
+        # Planning needs no CSV, so a bare topic name is accepted too
+        topics = [value.partition('=')[0] for value in args.sources]
+        unknown = [topic for topic in topics if topic not in TOPICS]
+        if unknown:
+            parser.error(f"unknown topic {', '.join(unknown)}; expected one of {', '.join(TOPICS)}")
+        print_missing(topics, *args.missing)
+        return 0
+    try:
+        sources = parse_sources(args.sources)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    failed = False
+    with ProcessPoolExecutor(max_workers=len(sources)) as executor:
+        futures = {
+            topic: executor.submit(ingest_topic, topic, csv_filename, args.backup_dir, args.fetched)
+            for topic, csv_filename in sources.items()
+        }
+        for topic, future in futures.items():
+            try:
+                output = future.result()
+            except Exception as e:
+                failed = True
+                print(f"[{topic}] Ingest failed: {e}")
+                continue
+            for line in output.splitlines():
+                print(f"[{topic}] {line}")
+
+    # Topics that did load are indexed and served from fresh snapshots either way
+    added = sync_index(all_topics_search().databases)
+    print(f"Added {added} papers to the cross-topic index.")
+    build_snapshots(tab_searches())
+    print("Rebuilt landing page snapshots.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,70 +1,224 @@
+import argparse
+import json
+import os
 import pandas as pd
 import sqlite3
+from datetime import datetime
+from utils.db import backfill, bump_generation, ensure_schema
+from utils.duplicates import base_id, fill_signatures
+from utils.export import export_excel, export_parquet, last_rowid
+from utils.facets import fill_facets
+from utils.intervals import record_window
+from utils.paper_index import sync_index
+from utils.render import fill_cards
+from utils.search import tab_searches
+from utils.snapshots import build_snapshots
+from utils.topics import TOPICS_BY_NAME, topic_files
  
+TOPICS = sorted(TOPICS_BY_NAME)
+
+
 # Constants
-DB_FILENAME = 'arxiv_wildfire_database.db'
-EXCEL_FILENAME = 'arxiv_wildfire_excel.xlsx'
-JSON_FILENAME = 'arxiv_wildfire_intervals.json'
+DEFAULT_TOPIC = 'wildfire'
+DB_FILENAME, EXCEL_FILENAME, JSON_FILENAME, PARQUET_DIRNAME = topic_files(DEFAULT_TOPIC)
+CSV_FILENAME = 'temp.csv'
+# Rows per CSV chunk; peak memory is bounded by one chunk, whatever the file size
+CHUNK_SIZE = 2000
+
+# CSV columns in arxiv_papers order; published_day is derived from published
+COLUMNS = [
+    'id', 'updated', 'published', 'title', 'summary', 'authors', 'affiliations', 'doi', 'comment',
+    'journal_ref', 'primary_category', 'categories', 'link_alternate', 'link_pdf', 'generated_summary'
+]
+ID, UPDATED = COLUMNS.index('id'), COLUMNS.index('updated')
+INSERT_SQL = f'''
+    INSERT OR IGNORE INTO arxiv_papers ({', '.join(COLUMNS)}, published_day)
+    VALUES ({', '.join('?' for _ in COLUMNS)}, ?)
+'''
+UPDATE_SQL = f'''
+    UPDATE arxiv_papers SET ({', '.join(COLUMNS)}, published_day) = ({', '.join('?' for _ in COLUMNS)}, ?)
+    WHERE rowid = ?
+'''
+
+
+def iter_rows(df: pd.DataFrame):
+    # Plain tuples straight from the frame instead of a Series per row
+    published = COLUMNS.index('published')
+    for row in df[COLUMNS].itertuples(index=False, name=None):
+        yield row + (row[published][:10],)
 
 
-def save_data(df: pd.DataFrame):
+def latest_versions(conn, rows):
+    # arXiv ids end in the version ('...2401.12345v2'). Keeps the newest version of
+    # each paper in `rows`; a paper already stored at an older version is updated
+    # in place (the triggers drop its card, facets and flags) and a row no newer
+    # than the stored version is dropped. Returns the rows left to insert and
+    # the rowids of the papers updated.
+    newest = {}
+    for row in rows:
+        key = base_id(row[ID])
+        if key not in newest or row[UPDATED] > newest[key][UPDATED]:
+            newest[key] = row
+
+    kept = []
+    updated_rowids = []
+    for key, row in newest.items():
+        stored = [
+            (rowid, paper_id, updated) for rowid, paper_id, updated in conn.execute(
+                "SELECT rowid, id, updated FROM arxiv_papers WHERE id = ? OR (id > ? AND id < ?)",
+                (key, key + 'v', key + 'w')
+            )
+            if base_id(paper_id) == key
+        ]
+        if any(paper_id == row[ID] or updated >= row[UPDATED] for _, paper_id, updated in stored):
+            continue
+        if not stored:
+            kept.append(row)
+            continue
+        # Older copies stored before versions were tracked are folded into one
+        rowid = stored[0][0]
+        conn.executemany("DELETE FROM arxiv_papers WHERE rowid = ?", [(other,) for other, _, _ in stored[1:]])
+        conn.execute(UPDATE_SQL, row + (rowid,))
+        updated_rowids.append(rowid)
+    return kept, updated_rowids
+
+
+def open_database(db_filename):
+    conn = sqlite3.connect(db_filename)
+    # Create table with generated_summary column and the indexed published_day
+    ensure_schema(conn)
+    # Derived tables are filled here, at ingest, rather than by the app
+    backfill(conn)
+    conn.commit()
+    # WAL makes NORMAL durable across app crashes; only an OS crash can drop the last commit
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def insert_rows(conn, df: pd.DataFrame):
+    # One executemany in one transaction; rowcount sums only the rows that
+    # INSERT OR IGNORE actually wrote, so duplicates and superseded versions are
+    # reported as skipped and newer versions of stored papers as inserted
+    after_rowid = last_rowid(conn)
+    with conn:
+        rows, updated_rowids = latest_versions(conn, iter_rows(df))
+        cursor = conn.executemany(INSERT_SQL, rows)
+        inserted = cursor.rowcount + len(updated_rowids)
+        # Result cards, author/category facets and near-duplicate flags for the
+        # new rows are built now rather than on first view. Updated papers keep
+        # their rowid, so they are passed explicitly.
+        for fill in (fill_cards, fill_facets, fill_signatures):
+            fill(conn, after_rowid)
+            if updated_rowids:
+                fill(conn, rowids=updated_rowids)
+        # New generation invalidates the app's cached pages and counts
+        if inserted:
+            bump_generation(conn)
+    return inserted
+
+
+def export_data(conn, files, after_rowid, inserted):
+    # New rows and new versions are appended as Parquet parts; the full Excel
+    # dump is only refreshed once per EXCEL_EXPORT_INTERVAL_SECONDS
+    if inserted:
+        exported = export_parquet(conn, files.parquet, after_rowid)
+        print(f"Exported {exported} records to {files.parquet}.")
+    if export_excel(conn, files.excel):
+        print(f"Exported full database to {files.excel}.")
+
+
+def save_data(df: pd.DataFrame, topic=DEFAULT_TOPIC):
     if df.empty:
         print("No data to save.")
         return
  
-    conn = sqlite3.connect(DB_FILENAME)
-    cursor = conn.cursor()
-    # Create table with generated_summary column
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS arxiv_papers (
-            id TEXT PRIMARY KEY,
-            updated TEXT,
-            published TEXT,
-            title TEXT,
-            summary TEXT,
-            authors TEXT,
-            affiliations TEXT,
-            doi TEXT,
-            comment TEXT,
-            journal_ref TEXT,
-            primary_category TEXT,
-            categories TEXT,
-            link_alternate TEXT,
-            link_pdf TEXT,
-            generated_summary TEXT
-        )
-    ''')
- 
-    inserted = 0
-    for _, row in df.iterrows():
-        cursor.execute('''
-            INSERT OR IGNORE INTO arxiv_papers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            row['id'], row['updated'], row['published'], row['title'], row['summary'], row['authors'],
-            row['affiliations'], row['doi'], row['comment'], row['journal_ref'], row['primary_category'],
-            row['categories'], row['link_alternate'], row['link_pdf'], row['generated_summary']
-        ))
-        inserted += cursor.rowcount
- 
-    conn.commit()
- 
-    # Export full DB to Excel, including generated_summary
-    full_df = pd.read_sql_query("SELECT * FROM arxiv_papers", conn)
-    full_df.to_excel(EXCEL_FILENAME, index=False)
+    files = topic_files(topic)
+    conn = open_database(files.db)
+    after_rowid = last_rowid(conn)
+    inserted = insert_rows(conn, df)
+    skipped = len(df) - inserted
+    export_data(conn, files, after_rowid, inserted)
  
     conn.close()
-    print(f"Inserted {inserted} new records.")
- 
-def main():
+    print(f"Inserted {inserted} new records, skipped {skipped} already stored.")
+
+
+# Progress of a chunked load is checkpointed next to the CSV, so a job that dies
+# partway resumes after the last committed chunk instead of starting over.
+def progress_filename(csv_filename, topic):
+    return f'{csv_filename}.{topic}.progress.json'
+
+
+def load_progress(csv_filename, topic, signature):
     try:
-        df = pd.read_csv('temp.csv')
-    except Exception as e:
-        print('Error reading csv file', str(e))
-        return
-    if not df.empty:
-        save_data(df)
+        with open(progress_filename(csv_filename, topic)) as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A different file under the same name starts from scratch
+    return progress if progress.get('signature') == signature else None
+
+
+def save_progress(csv_filename, topic, progress):
+    tmp_filename = progress_filename(csv_filename, topic) + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_filename, progress_filename(csv_filename, topic))
+
+
+def save_csv(csv_filename, topic=DEFAULT_TOPIC, chunksize=CHUNK_SIZE, terms=None, fetched=None):
+    # `fetched` is the (start, end) window the CSV was fetched for, recorded in
+    # the intervals ledger once the load completes. Rows are never filtered by
+    # the ledger: arXiv announces papers days after their published time and
+    # revisions keep it, so INSERT OR IGNORE and latest_versions de-duplicate.
+    stat = os.stat(csv_filename)
+    signature = [stat.st_size, stat.st_mtime_ns]
+
+    files = topic_files(topic)
+    conn = open_database(files.db)
+    progress = load_progress(csv_filename, topic, signature)
+    if progress is None:
+        progress = {'signature': signature, 'chunks': 0, 'after_rowid': last_rowid(conn)}
+    elif progress['chunks']:
+        print(f"Resuming {csv_filename} after chunk {progress['chunks']}.")
+
+    inserted = skipped = 0
+    for number, chunk in enumerate(pd.read_csv(csv_filename, chunksize=chunksize)):
+        if number < progress['chunks']:
+            continue
+        chunk_inserted = insert_rows(conn, chunk)
+        inserted += chunk_inserted
+        skipped += len(chunk) - chunk_inserted
+        progress['chunks'] = number + 1
+        save_progress(csv_filename, topic, progress)
+
+    # Exports cover every row added since the load first started, including earlier attempts
+    export_data(conn, files, progress['after_rowid'], inserted or last_rowid(conn) > progress['after_rowid'])
+    conn.close()
+    # The fetched window is now stored, so the next refresh can plan around it
+    # (utils.intervals.missing_windows)
+    if fetched:
+        record_window(files.intervals, *fetched, terms)
+    if os.path.exists(progress_filename(csv_filename, topic)):
+        os.remove(progress_filename(csv_filename, topic))
+
+    if inserted or skipped:
+        print(f"Inserted {inserted} new records, skipped {skipped} already stored.")
     else:
         print("No new data fetched.")
+ 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Load {CSV_FILENAME} into the {DEFAULT_TOPIC} database.")
+    parser.add_argument('--fetched', nargs=2, type=datetime.fromisoformat, metavar=('START', 'END'),
+                        help="window the CSV was fetched for, recorded in the intervals ledger")
+    args = parser.parse_args(argv)
+    try:
+        save_csv(CSV_FILENAME, fetched=args.fetched)
+        sync_index({topic: topic_files(topic).db for topic in TOPICS})
+        build_snapshots(tab_searches())
+    except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        print('Error reading csv file', str(e))
 
  
 if __name__ == "__main__":
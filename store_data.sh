@@ -1,9 +1,16 @@
 cd /app/arxiv_web
 
-cp arxiv_wildfire_database.db backups/arxiv_wildfire_database.db.latestbackup
-cp arxiv_wildfire_intervals.json backups/arxiv_wildfire_intervals.json.latestbackup
-cp arxiv_wildfire_excel.xlsx backups/arxiv_wildfire_excel.xlsx.latestbackup
+# The window the fetch job covered; it runs daily unless FETCH_START / FETCH_END say otherwise
+NOW=$(date +%s)
+END=${FETCH_END:-$(date -d @$NOW +%Y-%m-%dT%H:%M:%S)}
+START=${FETCH_START:-$(date -d @$((NOW - 86400)) +%Y-%m-%dT%H:%M:%S)}
+
+# Gaps in the last 30 days no fetch has covered, for the fetch job to backfill
+python ingest.py --missing "$(date -d @$((NOW - 30 * 86400)) +%Y-%m-%dT%H:%M:%S)" "$END" wildfire >> store_data.log 2>&1
 
 gsutil cp gs://datasciencedev/satellite_imaging/wildfire_forcasting/paper_aggregator/latest.csv temp.csv
 
-python store_data.py >> store_data.log 2>&1
\ No newline at end of file
+# Backs up each topic (SQLite online backup) and loads all listed topics in parallel.
+# Add more sources as <topic>=<csv>, e.g. ai=ai.csv quantum=quantum.csv
+# --fetched records the window in each topic's intervals ledger.
+python ingest.py --fetched "$START" "$END" wildfire=temp.csv >> store_data.log 2>&1
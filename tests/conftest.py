@@ -0,0 +1,12 @@
+import pytest
+
+from utils.cache import results_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    # Cached pages and counts are keyed by search name and generation, which
+    # repeat across tests that build fresh databases
+    results_cache.clear()
+    yield
+    results_cache.clear()
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from store_data import COLUMNS, insert_rows, open_database
+
+
+def paper(number, version=1, updated='2025-09-01T10:00:00Z', title=None):
+    link = f'http://arxiv.org/abs/2509.{number:05d}v{version}'
+    return {
+        'id': link,
+        'updated': updated,
+        'published': f'2025-09-01T{number % 24:02d}:00:00Z',
+        'title': title or f'Paper number {number} on wildfire spread',
+        'summary': f'Abstract {number} about forecasting fire behaviour with neural networks.',
+        'authors': f'Author {number}, Shared Author',
+        'affiliations': '',
+        'doi': '',
+        'comment': '',
+        'journal_ref': '',
+        'primary_category': 'cs.LG',
+        'categories': 'cs.LG, cs.AI',
+        'link_alternate': link,
+        'link_pdf': link.replace('/abs/', '/pdf/'),
+        'generated_summary': f'Summary of paper {number}.',
+    }
+
+
+def store(filename, papers):
+    conn = open_database(filename)
+    inserted = insert_rows(conn, pd.DataFrame(papers, columns=COLUMNS))
+    conn.close()
+    return inserted
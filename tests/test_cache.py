@@ -0,0 +1,38 @@
+from utils import cache
+from utils.cache import ResultCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    results = ResultCache(maxsize=2)
+    results.put('a', 1)
+    results.put('b', 2)
+    assert results.get('a') == 1
+    results.put('c', 3)
+    assert results.get('b') is None
+    assert (results.get('a'), results.get('c')) == (1, 3)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    results = ResultCache(ttl=10)
+    results.put('a', 1)
+    now[0] += 9
+    assert results.get('a') == 1
+    now[0] += 2
+    assert results.get('a') is None
+    assert 'a' not in results.entries
+
+
+def test_get_or_compute_computes_once_per_key():
+    results = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert results.get_or_compute('a', compute) == 1
+    assert results.get_or_compute('a', compute) == 1
+    assert results.get_or_compute('b', compute) == 2
+    assert len(calls) == 2
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pandas as pd
+
+from papers import paper, store
+from store_data import COLUMNS, INSERT_SQL, iter_rows, open_database
+from utils import db, render
+from utils.db import CREATE_TABLE_SQL, migrate_once, schema_current
+
+
+def count(filename, table):
+    conn = sqlite3.connect(filename)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_app_migration_leaves_backfills_to_ingest(tmp_path):
+    # A database written before cards, facets and signatures existed
+    filename = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(filename)
+    conn.execute(CREATE_TABLE_SQL)
+    conn.executemany(INSERT_SQL, iter_rows(pd.DataFrame([paper(1), paper(2)], columns=COLUMNS)))
+    conn.commit()
+    conn.close()
+    assert not schema_current(filename)
+
+    migrate_once(filename)
+    assert schema_current(filename)
+    assert count(filename, 'arxiv_papers_fts') == 2
+    assert count(filename, 'paper_cards') == count(filename, 'paper_authors') == count(filename, 'paper_lsh') == 0
+
+    # The next ingest fills them for the existing papers as well as the new one
+    store(filename, [paper(3)])
+    assert count(filename, 'paper_cards') == 3
+    assert count(filename, 'paper_authors') == 6
+    assert count(filename, "paper_lsh WHERE paper_rowid = 1") > 0
+
+
+def test_backfill_runs_only_when_needed(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'wildfire.db')
+    store(filename, [paper(1), paper(2)])
+
+    # Reopening for the next ingest walks no existing papers
+    calls = []
+    monkeypatch.setitem(db.BACKFILLS, 'paper_lsh', lambda conn: calls.append(conn))
+    open_database(filename).close()
+    assert calls == []
+
+    # A new card template re-renders the stored cards once
+    monkeypatch.setattr(db, 'TEMPLATE_VERSION', 3)
+    monkeypatch.setattr(render, 'TEMPLATE_VERSION', 3)
+    open_database(filename).close()
+    conn = sqlite3.connect(filename)
+    assert conn.execute("SELECT template_version, COUNT(*) FROM paper_cards GROUP BY 1").fetchall() == [(3, 2)]
+    conn.close()
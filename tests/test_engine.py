@@ -0,0 +1,20 @@
+from papers import paper, store
+from utils import engine
+
+DAY = '2025-09-01'
+
+
+def test_facet_filter_counts_versions_once(tmp_path):
+    databases = {'wildfire': str(tmp_path / 'wildfire.db'), 'ai': str(tmp_path / 'ai.db')}
+    revised = paper(1, version=2, updated='2025-09-20T10:00:00Z')
+    store(databases['wildfire'], [paper(1), paper(2)])
+    store(databases['ai'], [revised])
+
+    facets = {'author': 'Shared Author'}
+    assert engine.count_papers(databases, DAY, DAY) == 2
+    assert engine.count_papers(databases, DAY, DAY, facets) == 2
+    rows = engine.query_papers(databases, DAY, DAY, facets=facets)
+    assert [row.id for row in rows] == [paper(2)['id'], revised['id']]
+    # Seeking past the first row leaves only the other paper
+    after = (rows[0].published, rows[0].id)
+    assert [row.id for row in engine.query_papers(databases, DAY, DAY, after=after, facets=facets)] == [revised['id']]
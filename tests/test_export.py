@@ -0,0 +1,22 @@
+import time
+
+from papers import paper, store
+from store_data import open_database
+from utils import export
+
+
+def test_daily_excel_export_is_not_skipped(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'wildfire.db')
+    excel = str(tmp_path / 'wildfire.xlsx')
+    store(filename, [paper(1)])
+    conn = open_database(filename)
+    now = [time.time()]
+    monkeypatch.setattr(export.time, 'time', lambda: now[0])
+
+    assert export.export_excel(conn, excel)
+    now[0] += 60 * 60
+    assert not export.export_excel(conn, excel)
+    # The next daily run starts a few seconds short of 24 hours after the last one did
+    now[0] += 23 * 60 * 60 - 5
+    assert export.export_excel(conn, excel)
+    conn.close()
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+import ingest
+from utils.intervals import record_window
+from utils.topics import topic_files
+
+
+def test_missing_prints_unfetched_windows(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    record_window(topic_files('wildfire').intervals, datetime(2025, 9, 1), datetime(2025, 9, 3), ['wildfire'])
+    assert ingest.main(['--missing', '2025-08-30', '2025-09-05', 'wildfire', 'ai=ai.csv']) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        'wildfire 2025-08-30T00:00:00 2025-09-01T00:00:00',
+        'wildfire 2025-09-03T00:00:00 2025-09-05T00:00:00',
+        'ai 2025-08-30T00:00:00 2025-09-05T00:00:00',
+    ]
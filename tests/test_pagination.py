@@ -0,0 +1,90 @@
+import re
+
+from papers import paper, store
+from utils.pagination import PAGE_SIZE, remember_page, seek_position
+from utils.search import PaperSearch
+
+DAY = '2025-09-01'
+GENERATION = (1,)
+
+
+def numbered(first, last, day=DAY):
+    return [dict(paper(n), published=f'{day}T10:{n:02d}:00Z') for n in range(first, last)]
+
+
+def ids(rows):
+    return [row.id for row in rows]
+
+
+def numbers(html):
+    return [int(n) for n in re.findall(r'Paper number (\d+) on', html)]
+
+
+def number(paper_id):
+    # 'http://arxiv.org/abs/2509.00012v1' -> 12
+    return int(paper_id.rsplit('.', 1)[1].split('v')[0])
+
+
+def test_seek_position_uses_the_nearest_earlier_page():
+    token = remember_page(None, DAY, DAY, 1, ('p1', 'id1'), generation=GENERATION)
+    token = remember_page(token, DAY, DAY, 2, ('p2', 'id2'), generation=GENERATION)
+    assert seek_position(None, DAY, DAY, 3) == (None, 2 * PAGE_SIZE)
+    assert seek_position(token, DAY, DAY, 3, generation=GENERATION) == (('p2', 'id2'), 0)
+    assert seek_position(token, DAY, DAY, 5, generation=GENERATION) == (('p2', 'id2'), 2 * PAGE_SIZE)
+    assert seek_position(token, DAY, DAY, 2, generation=GENERATION) == (('p1', 'id1'), 0)
+    assert seek_position(token, DAY, DAY, 1, generation=GENERATION) == (None, 0)
+
+
+def test_token_is_ignored_outside_its_scope():
+    token = remember_page(None, DAY, DAY, 1, ('p1', 'id1'), {'author': 'A'}, GENERATION)
+    assert seek_position(token, DAY, DAY, 2, {'author': 'A'}, GENERATION) == (('p1', 'id1'), 0)
+    assert seek_position(token, DAY, '2025-09-02', 2, {'author': 'A'}, GENERATION) == (None, PAGE_SIZE)
+    assert seek_position(token, DAY, DAY, 2, {'author': 'B'}, GENERATION) == (None, PAGE_SIZE)
+    assert seek_position(token, DAY, DAY, 2, {'author': 'A'}, (2,)) == (None, PAGE_SIZE)
+    # Remembering a page in another scope starts a new token
+    other = remember_page(token, DAY, DAY, 1, ('q1', 'x'), generation=GENERATION)
+    assert other['pages'] == {1: ['q1', 'x']}
+
+
+def test_seek_pages_match_offset_pages(tmp_path):
+    filename = str(tmp_path / 'wildfire.db')
+    store(filename, numbered(0, 35))
+    search = PaperSearch('wildfire', {'wildfire': filename})
+    generation = search.generation()
+
+    def offset_page(page):
+        return ids(search.query_papers(DAY, DAY, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE))
+
+    def seek_page(token, page):
+        after, offset = seek_position(token, DAY, DAY, page, generation=generation)
+        rows = search.query_papers(DAY, DAY, limit=PAGE_SIZE, offset=offset, after=after)
+        last_key = (rows[-1].published, rows[-1].id) if rows else None
+        return ids(rows), remember_page(token, DAY, DAY, page, last_key, generation=generation)
+
+    token = None
+    for page in range(1, 6):
+        rows, token = seek_page(token, page)
+        assert rows == offset_page(page)
+    assert offset_page(5) == []
+
+    # Jumping ahead from a token that only knows page 1
+    _, partial = seek_page(None, 1)
+    assert seek_page(partial, 4)[0] == offset_page(4)
+
+
+def test_token_from_another_range_does_not_skip_papers(tmp_path):
+    filename = str(tmp_path / 'wildfire.db')
+    store(filename, numbered(0, 25) + numbered(25, 40, day='2025-09-02'))
+    search = PaperSearch('wildfire', {'wildfire': filename})
+
+    _, token = search.display_results(DAY, DAY, 1)
+    _, token = search.display_results(DAY, DAY, 2, token)
+    # The user widens the range and opens page 2 with the old token
+    html, _ = search.display_results(DAY, '2025-09-02', 2, token)
+    expected = search.query_papers(DAY, '2025-09-02', limit=PAGE_SIZE, offset=PAGE_SIZE)
+    assert numbers(html) == [number(row.id) for row in expected]
+
+    # A facet filter that matches only some papers pages from its own start
+    facets = {'author': 'Author 3'}
+    html, _ = search.display_results(DAY, DAY, 1, token, facets=facets)
+    assert numbers(html) == [3]
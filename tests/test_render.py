@@ -0,0 +1,8 @@
+from utils.render import render_card
+
+
+def test_pdf_preview_is_not_loaded_with_the_card():
+    card = render_card('Title', 'Author', '2025-09-01T10:00:00Z', 'Summary', 'http://arxiv.org/abs/2509.00001v1',
+                       'http://arxiv.org/pdf/2509.00001v1')
+    assert '<iframe' not in card
+    assert 'data-pdf="https://arxiv.org/pdf/2509.00001v1"' in card
@@ -0,0 +1,47 @@
+import re
+
+from papers import paper, store
+from utils.search import PaperSearch
+
+DAY = '2025-09-01'
+
+
+def numbered(first, last):
+    # One minute apart, so the newest papers have the highest numbers
+    return [dict(paper(n), published=f'{DAY}T10:{n:02d}:00Z') for n in range(first, last)]
+
+
+def titles(html):
+    return [int(n) for n in re.findall(r'Paper number (\d+) on', html)]
+
+
+def test_old_token_does_not_poison_cached_pages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filename = str(tmp_path / 'wildfire.db')
+    store(filename, numbered(0, 25))
+    search = PaperSearch('wildfire', {'wildfire': filename})
+
+    # User A pages through the first two pages, then newer papers are ingested
+    _, token_a = search.display_results(DAY, DAY, 1)
+    _, token_a = search.display_results(DAY, DAY, 2, token_a)
+    store(filename, numbered(25, 30))
+    html, _ = search.display_results(DAY, DAY, 3, token_a)
+    assert titles(html) == list(range(9, -1, -1))
+
+    # User B browsing from scratch sees every paper once
+    seen = []
+    token_b = None
+    for page in (1, 2, 3):
+        html, token_b = search.display_results(DAY, DAY, page, token_b)
+        seen += titles(html)
+    assert seen == list(range(29, -1, -1))
+
+
+def test_cached_count_is_not_served_after_an_ingest(tmp_path):
+    filename = str(tmp_path / 'wildfire.db')
+    store(filename, numbered(0, 5))
+    search = PaperSearch('wildfire', {'wildfire': filename})
+    assert search.total_results(DAY, DAY) == 5
+    assert search.total_results(DAY, DAY) == 5
+    store(filename, numbered(5, 8))
+    assert search.total_results(DAY, DAY) == 8
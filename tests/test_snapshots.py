@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from papers import paper, store
+from utils import snapshots
+from utils.search import PaperSearch
+
+
+def test_default_window_is_rebuilt_after_the_date_rolls_over(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(snapshots, '_rolled', {})
+    filename = str(tmp_path / 'wildfire.db')
+    yesterday = datetime.now() - timedelta(days=1)
+    store(filename, [dict(paper(n), published=yesterday.strftime(f'%Y-%m-%dT{n:02d}:00:00Z')) for n in range(3)])
+    search = PaperSearch('wildfire', {'wildfire': filename})
+
+    # The last ingest ran yesterday, so its snapshot is for yesterday's window
+    snapshots.build_snapshots([search], today=yesterday)
+    start_date, end_date = snapshots.default_window()
+    assert snapshots.find_snapshot('wildfire', start_date, end_date, search.generation()) is None
+
+    total, html, _ = search.landing(start_date, end_date)
+    assert total == 3 and 'Paper number 2 on' in html
+    assert snapshots._rolled['wildfire']['generation'] == list(search.generation())
+
+    # A later ingest makes the built view stale as well
+    store(filename, [dict(paper(3), published=yesterday.strftime('%Y-%m-%dT03:00:00Z'))])
+    assert search.landing(start_date, end_date)[0] == 4
+    assert search.landing(start_date, '2025-01-01') is None
@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from papers import paper, store
+from store_data import COLUMNS, save_csv
+from utils.intervals import missing_windows
+from utils import engine
+from utils.paper_index import INDEX_FILENAME, sync_index
+from utils.search import PaperSearch
+from utils.topics import topic_files
+
+
+def test_newer_version_of_last_inserted_paper(tmp_path):
+    databases = {'wildfire': str(tmp_path / 'wildfire.db'), 'ai': str(tmp_path / 'ai.db')}
+    store(databases['wildfire'], [paper(1), paper(2), paper(3)])
+    store(databases['ai'], [paper(3)])
+    assert sync_index(databases) == 4
+
+    # The replaced paper has the highest rowid, which used to be handed to the new version
+    revised = paper(3, version=2, updated='2025-09-20T10:00:00Z', title='Revised wildfire paper')
+    assert store(databases['wildfire'], [revised]) == 1
+    assert store(databases['wildfire'], [paper(3)]) == 0
+
+    conn = sqlite3.connect(databases['wildfire'])
+    assert conn.execute("SELECT rowid, id FROM arxiv_papers ORDER BY rowid").fetchall()[-1] == (3, revised['id'])
+    assert conn.execute("SELECT COUNT(*) FROM paper_cards WHERE id = ?", (revised['id'],)).fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM paper_authors WHERE paper_id = ?", (revised['id'],)).fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM paper_lsh WHERE paper_rowid = 3").fetchone()[0] > 0
+    assert conn.execute("SELECT old_id, new_id FROM paper_versions").fetchall() == [(paper(3)['id'], revised['id'])]
+    conn.close()
+
+    assert sync_index(databases) == 1
+    index = sqlite3.connect(str(tmp_path / INDEX_FILENAME))
+    assert index.execute("SELECT id FROM papers WHERE id LIKE '%.00003v%'").fetchall() == [(revised['id'],)]
+    index.close()
+
+    search = PaperSearch('test-all', databases, tag_topics=True)
+    assert search.count_papers('2025-09-01', '2025-09-01') == 3
+    html, _ = search.render_page('2025-09-01', '2025-09-01', 1)
+    assert 'Revised wildfire paper' in html
+    assert len(engine.query_papers(databases, '2025-09-01', '2025-09-01')) == 3
+
+
+def test_late_announced_paper_is_stored(tmp_path, monkeypatch):
+    # A paper published inside an earlier fetch window but first fetched later
+    monkeypatch.chdir(tmp_path)
+    day1 = [dict(paper(1), published='2025-09-01T10:00:00Z'), dict(paper(3), published='2025-09-03T10:00:00Z')]
+    day2 = [dict(paper(2), published='2025-09-02T10:00:00Z'), dict(paper(4), published='2025-09-04T10:00:00Z')]
+    pd.DataFrame(day1, columns=COLUMNS).to_csv('day1.csv', index=False)
+    pd.DataFrame(day2, columns=COLUMNS).to_csv('day2.csv', index=False)
+    save_csv('day1.csv', 'wildfire', terms=['wildfire'], fetched=(datetime(2025, 9, 1), datetime(2025, 9, 4)))
+    save_csv('day2.csv', 'wildfire', terms=['wildfire'], fetched=(datetime(2025, 9, 4), datetime(2025, 9, 5)))
+
+    files = topic_files('wildfire')
+    conn = sqlite3.connect(files.db)
+    assert conn.execute("SELECT COUNT(*) FROM arxiv_papers").fetchone()[0] == 4
+    conn.close()
+    assert missing_windows(files.intervals, datetime(2025, 9, 1), datetime(2025, 9, 6), ['wildfire']) == [
+        (datetime(2025, 9, 5), datetime(2025, 9, 6))
+    ]
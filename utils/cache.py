@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+from utils import metrics
+
+CACHE_SIZE = 1024
+CACHE_TTL_SECONDS = 600
+
+
+class ResultCache:
+    # In-process LRU with a TTL. Keys include the database generation (see
+    # utils.engine.generation), so an ingest makes old entries unreachable and
+    # they simply age out of the LRU.
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL_SECONDS, name='results'):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_or_compute(self, key, compute):
+        # compute() runs outside the lock; concurrent misses may both compute
+        value = self.get(key)
+        metrics.increment('cache_requests_total', cache=self.name, result='miss' if value is None else 'hit')
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+
+results_cache = ResultCache()
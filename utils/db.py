@@ -0,0 +1,445 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from utils.duplicates import fill_signatures
+from utils.facets import fill_facets
+from utils.render import TEMPLATE_VERSION, fill_cards
+
+# Read connections are pooled per database and shared by all Gradio workers
+POOL_SIZE = 8
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 32 * 1024
+MIGRATE_TIMEOUT_SECONDS = 60
+
+CREATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS arxiv_papers (
+        id TEXT PRIMARY KEY,
+        updated TEXT,
+        published TEXT,
+        title TEXT,
+        summary TEXT,
+        authors TEXT,
+        affiliations TEXT,
+        doi TEXT,
+        comment TEXT,
+        journal_ref TEXT,
+        primary_category TEXT,
+        categories TEXT,
+        link_alternate TEXT,
+        link_pdf TEXT,
+        generated_summary TEXT,
+        published_day TEXT
+    )
+'''
+
+# published_day is substr(published, 1, 10) stored as a plain column so date
+# filters can use the index instead of parsing every row.
+CREATE_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_arxiv_papers_published_day
+    ON arxiv_papers (published_day, published, id)
+'''
+
+
+# External-content FTS5 index over the text columns, kept in sync by triggers
+# so every insert, update or delete on arxiv_papers (including save_data's
+# bulk INSERT) is reflected without a separate indexing step.
+CREATE_FTS_SQL = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS arxiv_papers_fts USING fts5(
+        title, summary, generated_summary,
+        content='arxiv_papers', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS arxiv_papers_fts_insert AFTER INSERT ON arxiv_papers BEGIN
+        INSERT INTO arxiv_papers_fts (rowid, title, summary, generated_summary)
+        VALUES (new.rowid, new.title, new.summary, new.generated_summary);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS arxiv_papers_fts_delete AFTER DELETE ON arxiv_papers BEGIN
+        INSERT INTO arxiv_papers_fts (arxiv_papers_fts, rowid, title, summary, generated_summary)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.generated_summary);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS arxiv_papers_fts_update AFTER UPDATE ON arxiv_papers BEGIN
+        INSERT INTO arxiv_papers_fts (arxiv_papers_fts, rowid, title, summary, generated_summary)
+        VALUES ('delete', old.rowid, old.title, old.summary, old.generated_summary);
+        INSERT INTO arxiv_papers_fts (rowid, title, summary, generated_summary)
+        VALUES (new.rowid, new.title, new.summary, new.generated_summary);
+    END
+    ''',
+]
+
+
+# Pre-rendered result cards (see utils.render); a changed or removed paper drops
+# its card so it is rendered again from the new row
+CREATE_CARDS_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS paper_cards (
+        id TEXT NOT NULL,
+        template_version INTEGER NOT NULL,
+        html TEXT NOT NULL,
+        PRIMARY KEY (id, template_version)
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_cards_update AFTER UPDATE ON arxiv_papers BEGIN
+        DELETE FROM paper_cards WHERE id = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_cards_delete AFTER DELETE ON arxiv_papers BEGIN
+        DELETE FROM paper_cards WHERE id = old.id;
+    END
+    ''',
+]
+
+
+# Papers per published_day, kept current by triggers so a date-range count is a
+# sum over at most one row per day instead of a walk over the papers index
+def daily_counts_sql(table='arxiv_papers'):
+    return [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_counts (
+            day TEXT PRIMARY KEY,
+            n INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_counts_insert AFTER INSERT ON {table}
+        WHEN new.published_day IS NOT NULL BEGIN
+            INSERT INTO daily_counts (day, n) VALUES (new.published_day, 1)
+            ON CONFLICT (day) DO UPDATE SET n = n + 1;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_counts_delete AFTER DELETE ON {table}
+        WHEN old.published_day IS NOT NULL BEGIN
+            UPDATE daily_counts SET n = n - 1 WHERE day = old.published_day;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_counts_update AFTER UPDATE OF published_day ON {table} BEGIN
+            UPDATE daily_counts SET n = n - 1 WHERE day = old.published_day;
+            INSERT INTO daily_counts (day, n) SELECT new.published_day, 1 WHERE new.published_day IS NOT NULL
+            ON CONFLICT (day) DO UPDATE SET n = n + 1;
+        END
+        ''',
+    ]
+
+
+# Authors and categories split out of arxiv_papers by utils.facets.fill_facets.
+# The primary key serves filters on one value over a date range, the
+# published_day index facet counts over a range, and the paper_id index the
+# triggers that drop a changed or removed paper's rows (refilled at ingest).
+CREATE_FACETS_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS paper_authors (
+        author TEXT NOT NULL COLLATE NOCASE,
+        published_day TEXT,
+        paper_id TEXT NOT NULL,
+        PRIMARY KEY (author, published_day, paper_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_paper_authors_published_day ON paper_authors (published_day)",
+    "CREATE INDEX IF NOT EXISTS idx_paper_authors_paper_id ON paper_authors (paper_id)",
+    '''
+    CREATE TABLE IF NOT EXISTS paper_categories (
+        category TEXT NOT NULL COLLATE NOCASE,
+        published_day TEXT,
+        paper_id TEXT NOT NULL,
+        PRIMARY KEY (category, published_day, paper_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_paper_categories_published_day ON paper_categories (published_day)",
+    "CREATE INDEX IF NOT EXISTS idx_paper_categories_paper_id ON paper_categories (paper_id)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_facets_update
+    AFTER UPDATE OF id, published_day, authors, categories ON arxiv_papers BEGIN
+        DELETE FROM paper_authors WHERE paper_id = old.id;
+        DELETE FROM paper_categories WHERE paper_id = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_facets_delete AFTER DELETE ON arxiv_papers BEGIN
+        DELETE FROM paper_authors WHERE paper_id = old.id;
+        DELETE FROM paper_categories WHERE paper_id = old.id;
+    END
+    ''',
+]
+
+
+# Every paper id inserted, changed or removed, in order, for readers that keep
+# derived data current incrementally (utils.paper_index). AUTOINCREMENT keeps
+# change_id increasing after a reader prunes the changes it has applied.
+CREATE_CHANGES_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS paper_changes (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        paper_id TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_changes_insert AFTER INSERT ON arxiv_papers BEGIN
+        INSERT INTO paper_changes (paper_id) VALUES (new.id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_changes_update AFTER UPDATE ON arxiv_papers BEGIN
+        INSERT INTO paper_changes (paper_id) SELECT old.id WHERE old.id != new.id;
+        INSERT INTO paper_changes (paper_id) VALUES (new.id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_changes_delete AFTER DELETE ON arxiv_papers BEGIN
+        INSERT INTO paper_changes (paper_id) VALUES (old.id);
+    END
+    ''',
+]
+
+
+# A paper updated in place to a newer arXiv version (store_data.latest_versions)
+# is logged here, so the append-only Parquet export can add the new version and
+# a tombstone for the old one (utils.export.export_parquet)
+CREATE_VERSIONS_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS paper_versions (
+        old_id TEXT PRIMARY KEY,
+        new_id TEXT NOT NULL,
+        exported INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_paper_versions_exported ON paper_versions (exported, new_id)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_versions_update AFTER UPDATE OF id ON arxiv_papers
+    WHEN old.id != new.id BEGIN
+        INSERT OR REPLACE INTO paper_versions (old_id, new_id) VALUES (old.id, new.id);
+    END
+    ''',
+]
+
+
+# MinHash LSH buckets per paper (see utils.duplicates) and the near-duplicates
+# found through them, each paper recorded against the earlier one it resembles.
+# A changed or removed paper drops its rows; they are refilled at ingest.
+CREATE_DUPLICATES_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS paper_lsh (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        paper_rowid INTEGER NOT NULL,
+        PRIMARY KEY (band, bucket, paper_rowid)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_paper_lsh_paper_rowid ON paper_lsh (paper_rowid)",
+    '''
+    CREATE TABLE IF NOT EXISTS near_duplicates (
+        paper_id TEXT NOT NULL,
+        duplicate_of TEXT NOT NULL,
+        similarity REAL NOT NULL,
+        PRIMARY KEY (paper_id, duplicate_of)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_near_duplicates_duplicate_of ON near_duplicates (duplicate_of)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_duplicates_update AFTER UPDATE OF id, title, summary ON arxiv_papers BEGIN
+        DELETE FROM paper_lsh WHERE paper_rowid = old.rowid;
+        DELETE FROM near_duplicates WHERE paper_id = old.id OR duplicate_of = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS paper_duplicates_delete AFTER DELETE ON arxiv_papers BEGIN
+        DELETE FROM paper_lsh WHERE paper_rowid = old.rowid;
+        DELETE FROM near_duplicates WHERE paper_id = old.id OR duplicate_of = old.id;
+    END
+    ''',
+]
+
+
+# Schema state for backfill: 'template_version' is the version paper_cards was
+# rendered at, and a 'backfill:<table>' row marks a derived table created since
+# the last ingest, so it is filled in full once rather than on every open
+CREATE_META_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_meta (
+        name TEXT PRIMARY KEY,
+        value
+    )
+'''
+
+# Derived table -> the fill that builds it from arxiv_papers
+BACKFILLS = {'paper_cards': fill_cards, 'paper_authors': fill_facets, 'paper_lsh': fill_signatures}
+
+# Every table ensure_schema creates
+SCHEMA_TABLES = {
+    'arxiv_papers', 'arxiv_papers_fts', 'paper_cards', 'daily_counts', 'paper_authors', 'paper_categories',
+    'paper_lsh', 'near_duplicates', 'paper_changes', 'paper_versions', 'schema_meta',
+}
+
+
+def table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def get_meta(conn, name):
+    row = conn.execute("SELECT value FROM schema_meta WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn, name, value):
+    conn.execute("INSERT OR REPLACE INTO schema_meta (name, value) VALUES (?, ?)", (name, value))
+
+
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    # WAL is persistent, so readers opened later never block on the ingest writer
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute(CREATE_TABLE_SQL)
+
+    # Databases created before published_day existed get the column added and backfilled
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(arxiv_papers)")}
+    if 'published_day' not in columns:
+        cursor.execute("ALTER TABLE arxiv_papers ADD COLUMN published_day TEXT")
+    cursor.execute(CREATE_INDEX_SQL)
+    cursor.execute('''
+        UPDATE arxiv_papers SET published_day = substr(published, 1, 10)
+        WHERE published_day IS NULL
+    ''')
+
+    # The first time the index is created it is filled from the existing rows
+    fts_exists = table_exists(conn, 'arxiv_papers_fts')
+    for statement in CREATE_FTS_SQL:
+        cursor.execute(statement)
+    if not fts_exists:
+        cursor.execute("INSERT INTO arxiv_papers_fts (arxiv_papers_fts) VALUES ('rebuild')")
+
+    # A database from before schema_meta is backfilled once in full
+    created = [table for table in BACKFILLS if not table_exists(conn, table)]
+    if not table_exists(conn, 'schema_meta'):
+        created = list(BACKFILLS)
+    cursor.execute(CREATE_META_SQL)
+
+    for statement in CREATE_CARDS_SQL:
+        cursor.execute(statement)
+
+    counts_exist = table_exists(conn, 'daily_counts')
+    for statement in daily_counts_sql():
+        cursor.execute(statement)
+    if not counts_exist:
+        cursor.execute('''
+            INSERT INTO daily_counts (day, n)
+            SELECT published_day, COUNT(*) FROM arxiv_papers
+            WHERE published_day IS NOT NULL
+            GROUP BY published_day
+        ''')
+
+    for statement in CREATE_FACETS_SQL + CREATE_DUPLICATES_SQL + CREATE_CHANGES_SQL + CREATE_VERSIONS_SQL:
+        cursor.execute(statement)
+    for table in created:
+        set_meta(conn, f'backfill:{table}', 1)
+
+
+def backfill(conn):
+    # Fills the derived tables ensure_schema created since the last ingest, and
+    # re-renders every card after a TEMPLATE_VERSION change. Both walk every
+    # paper, so this runs at ingest (store_data.open_database), never from the
+    # app's first request; new papers are filled by insert_rows itself
+    if get_meta(conn, 'template_version') != TEMPLATE_VERSION:
+        conn.execute("DELETE FROM paper_cards WHERE template_version != ?", (TEMPLATE_VERSION,))
+        set_meta(conn, 'backfill:paper_cards', 1)
+        set_meta(conn, 'template_version', TEMPLATE_VERSION)
+    for table, fill in BACKFILLS.items():
+        if get_meta(conn, f'backfill:{table}'):
+            fill(conn)
+            conn.execute("DELETE FROM schema_meta WHERE name = ?", (f'backfill:{table}',))
+
+
+def migrate(db_filename):
+    # Waits out an ingest holding the write lock instead of failing the request
+    conn = sqlite3.connect(db_filename, timeout=MIGRATE_TIMEOUT_SECONDS)
+    try:
+        ensure_schema(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def schema_current(db_filename):
+    # Checked on a read-only connection, so the app takes no write lock on a
+    # database an ingest has already migrated
+    try:
+        conn = sqlite3.connect(readonly_uri(db_filename), uri=True)
+        try:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:
+        return False
+    return SCHEMA_TABLES <= names
+
+
+def migrate_once(db_filename):
+    # Databases are migrated when first opened by the app, not when imported;
+    # only a database no ingest has migrated yet is opened for writing
+    with _migrated_lock:
+        if db_filename not in _migrated:
+            if not schema_current(db_filename):
+                migrate(db_filename)
+            _migrated.add(db_filename)
+
+
+def readonly_uri(db_filename):
+    return Path(db_filename).resolve().as_uri() + "?mode=ro"
+
+
+def tune_connection(conn, schema='main'):
+    conn.execute(f"PRAGMA {schema}.mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA {schema}.cache_size = -{CACHE_SIZE_KIB}")
+
+
+class ConnectionPool:
+    def __init__(self, factory, size=POOL_SIZE):
+        self.factory = factory
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        # Reuse the most recently returned connection so its page cache is warm;
+        # bursts beyond `size` get extra connections that are closed afterwards
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.factory()
+        try:
+            yield conn
+        finally:
+            try:
+                self.idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(factory)
+        return _pools[key]
+
+
+# PRAGMA user_version is the ingest generation: save_data bumps it after
+# every commit that inserts rows, which invalidates cached pages and counts
+# (read through utils.engine.generation).
+def bump_generation(conn):
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.execute(f"PRAGMA user_version = {current + 1}")
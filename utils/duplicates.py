@@ -0,0 +1,127 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+from utils.rowids import only_rowids, rowid_params
+
+# Near-duplicate detection with MinHash and LSH banding. A paper's title and
+# summary become SIGNATURE_SIZE minimum hashes over its word shingles; two papers
+# agree on each one with probability equal to their Jaccard similarity. The
+# signature is cut into BANDS bands, each stored as a bucket in paper_lsh (see
+# utils.db), so the candidates for a new paper are the papers sharing one of its
+# buckets, found through the primary key instead of by comparing every pair.
+
+SHINGLE_WORDS = 3
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS_PER_BAND = SIGNATURE_SIZE // BANDS
+# Estimated Jaccard similarity from which a candidate is recorded in near_duplicates
+SIMILARITY_THRESHOLD = 0.8
+
+# Hash permutations (a * x + b) mod PRIME, fixed so signatures are stable across
+# runs; a < 2**31 keeps a * x + b inside uint64 for 32-bit shingle hashes
+PRIME = 4294967311
+SHINGLE_MULTIPLIER = np.uint64(1000003)
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 2 ** 31, SIGNATURE_SIZE, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, SIGNATURE_SIZE, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r'\w+')
+VERSION_PATTERN = re.compile(r'v\d+$')
+
+
+def base_id(paper_id):
+    # 'http://arxiv.org/abs/2401.12345v2' -> 'http://arxiv.org/abs/2401.12345'
+    return VERSION_PATTERN.sub('', paper_id)
+
+
+def shingle_hashes(title, summary):
+    # 32-bit hashes of every run of SHINGLE_WORDS consecutive words, combined
+    # from per-word hashes so no shingle string is built
+    words = WORD_PATTERN.findall(f"{title or ''} {summary or ''}".lower())
+    hashes = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.uint64, count=len(words))
+    size = max(len(words) - SHINGLE_WORDS + 1, 1)
+    shingles = hashes[:size]
+    for i in range(1, min(SHINGLE_WORDS, len(words))):
+        shingles = shingles * SHINGLE_MULTIPLIER + hashes[i:i + size]
+    return np.unique(shingles & 0xFFFFFFFF)
+
+
+def signature(title, summary):
+    # None for a paper with no words, which would match every other empty one
+    hashes = shingle_hashes(title, summary)
+    if not hashes.size:
+        return None
+    return ((np.outer(hashes, _A) + _B) % PRIME).min(axis=0)
+
+
+def similarity(a, b):
+    return float(np.mean(a == b))
+
+
+def buckets(sig):
+    # One signed 64-bit bucket per band, as stored in paper_lsh
+    return [
+        int.from_bytes(hashlib.blake2b(sig[i:i + ROWS_PER_BAND].tobytes(), digest_size=8).digest(), 'little', signed=True)
+        for i in range(0, SIGNATURE_SIZE, ROWS_PER_BAND)
+    ]
+
+
+def _flag(conn, rowids, signatures):
+    # Compares the papers just signed with every other paper sharing a bucket
+    # and records the similar ones, the later stored against the earlier;
+    # returns how many were recorded
+    pairs = {
+        (max(new, other), min(new, other)) for new, other in conn.execute('''
+            SELECT DISTINCT n.paper_rowid, o.paper_rowid
+            FROM paper_lsh n
+            JOIN paper_lsh o ON o.band = n.band AND o.bucket = n.bucket AND o.paper_rowid != n.paper_rowid
+            WHERE n.paper_rowid IN (SELECT value FROM json_each(?))
+        ''', rowid_params(rowids))
+    }
+    ids = {}
+    for rowid in {rowid for pair in pairs for rowid in pair}:
+        paper_id, title, summary = conn.execute(
+            "SELECT id, title, summary FROM arxiv_papers WHERE rowid = ?", (rowid,)
+        ).fetchone()
+        ids[rowid] = paper_id
+        if rowid not in signatures:
+            signatures[rowid] = signature(title, summary)
+
+    flagged = []
+    for new, old in pairs:
+        score = similarity(signatures[new], signatures[old])
+        if score >= SIMILARITY_THRESHOLD:
+            flagged.append((ids[new], ids[old], score))
+    conn.executemany(
+        "INSERT OR REPLACE INTO near_duplicates (paper_id, duplicate_of, similarity) VALUES (?, ?, ?)", flagged
+    )
+    return len(flagged)
+
+
+def fill_signatures(conn, after_rowid=0, batch_size=1000, rowids=None):
+    # Buckets every paper (with rowid > after_rowid, or among `rowids`) that has
+    # none yet and flags it against the other papers; returns how many were flagged
+    flagged = 0
+    last_rowid = after_rowid
+    while True:
+        rows = conn.execute(f'''
+            SELECT rowid, title, summary
+            FROM arxiv_papers
+            WHERE rowid > ? AND NOT EXISTS (SELECT 1 FROM paper_lsh l WHERE l.paper_rowid = arxiv_papers.rowid){only_rowids(rowids)}
+            ORDER BY rowid
+            LIMIT ?
+        ''', (last_rowid, *rowid_params(rowids), batch_size)).fetchall()
+        if not rows:
+            return flagged
+        signatures = {}
+        for rowid, title, summary in rows:
+            sig = signature(title, summary)
+            if sig is not None:
+                signatures[rowid] = sig
+        conn.executemany(
+            "INSERT OR IGNORE INTO paper_lsh (band, bucket, paper_rowid) VALUES (?, ?, ?)",
+            [(band, bucket, rowid) for rowid, sig in signatures.items() for band, bucket in enumerate(buckets(sig))]
+        )
+        flagged += _flag(conn, list(signatures), signatures)
+        last_rowid = rows[-1][0]
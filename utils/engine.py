@@ -0,0 +1,243 @@
+import sqlite3
+from collections import namedtuple
+from utils import fulltext
+from utils.facets import FACET_LIMIT, FACETS, any_facet_filter, any_facet_params, facet_filter, facet_params
+from utils.db import get_pool, migrate_once, readonly_uri, tune_connection
+from utils.paper_index import sync_once
+from utils.render import TEMPLATE_VERSION
+
+# Cross-topic queries run against one connection with every topic database
+# ATTACHed under its alias, so a count or a page is a single statement.
+# `databases` maps alias -> database filename, e.g. {'ai': 'arxiv_ai_database.db'}.
+# Several topics also get the cross-topic id index (utils.paper_index) ATTACHed
+# as INDEX_ALIAS, which holds each paper once however many topics store it.
+
+INDEX_ALIAS = 'papers_index'
+
+PAPER_COLUMNS = ['title', 'authors', 'published', 'updated', 'generated_summary', 'link_alternate', 'link_pdf']
+
+# What a page query returns per paper: its sort key, the comma-separated topic
+# aliases holding it, its stored card and, for keyword hits, the snippet. The
+# long text columns are only read by paper_details, for papers without a card.
+PageRow = namedtuple('PageRow', ['id', 'published', 'updated', 'topics', 'card', 'match'], defaults=[None])
+
+
+def page_row(cursor, row):
+    return PageRow(*row)
+
+
+def connect(databases):
+    conn = sqlite3.connect(':memory:', uri=True, check_same_thread=False)
+    for alias, filename in databases.items():
+        migrate_once(filename)
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (readonly_uri(filename),))
+        tune_connection(conn, alias)
+    if len(databases) > 1:
+        conn.execute(f"ATTACH DATABASE ? AS {INDEX_ALIAS}", (readonly_uri(sync_once(databases)),))
+        tune_connection(conn, INDEX_ALIAS)
+    return conn
+
+
+def read_connection(databases):
+    key = tuple(sorted(databases.items()))
+    return get_pool(key, lambda: connect(databases)).connection()
+
+
+def _schemas(databases):
+    return list(databases) + ([INDEX_ALIAS] if len(databases) > 1 else [])
+
+
+def generation(databases):
+    with read_connection(databases) as conn:
+        return tuple(conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0] for schema in _schemas(databases))
+
+
+def _indexed(databases):
+    return len(databases) > 1
+
+
+def _keys_query(databases, after=None, facets=None):
+    # Across topics the id index lists each paper once, by base id, as its newest
+    # version; facet filters match that version's rows in whichever topics hold it
+    if _indexed(databases):
+        query = f"SELECT published_day, published, id FROM {INDEX_ALIAS}.papers WHERE published_day BETWEEN ? AND ?"
+        query += any_facet_filter(list(databases), facets or {})
+    else:
+        alias = next(iter(databases))
+        query = f"SELECT published_day, published, id FROM {alias}.arxiv_papers WHERE published_day BETWEEN ? AND ?"
+        query += facet_filter(alias, facets or {})
+    if after is not None:
+        query += " AND (published_day, published, id) < (?, ?, ?)"
+    return query
+
+
+def _keys_params(databases, start_date, end_date, after=None, facets=None):
+    params = [start_date, end_date]
+    if _indexed(databases):
+        params += any_facet_params(list(databases), facets or {}, start_date, end_date)
+    else:
+        params += facet_params(facets or {}, start_date, end_date)
+    if after is not None:
+        published, paper_id = after
+        params.extend([published[:10], published, paper_id])
+    return params
+
+
+def count_papers(databases, start_date, end_date, facets=None):
+    # One topic has no duplicates, and the id index holds each paper once, so
+    # either daily_counts rollup is exact
+    if not facets:
+        schema = INDEX_ALIAS if len(databases) > 1 else next(iter(databases))
+        query = f"SELECT COALESCE(SUM(n), 0) FROM {schema}.daily_counts WHERE day BETWEEN ? AND ?"
+    else:
+        query = f'''
+            SELECT COUNT(*) FROM (
+            {_keys_query(databases, facets=facets)}
+            )
+        '''
+    with read_connection(databases) as conn:
+        total = conn.execute(query, _keys_params(databases, start_date, end_date, facets=facets)).fetchone()[0]
+    return total
+
+
+def facet_counts(databases, facet, start_date, end_date, limit=FACET_LIMIT):
+    # [(value, papers)] for the most common authors or categories in the range;
+    # a paper stored in several topics counts once
+    table, column = FACETS[facet]
+    arms = "\n        UNION ALL\n        ".join(
+        f"SELECT {column} AS value, paper_id FROM {alias}.{table} WHERE published_day BETWEEN ? AND ?"
+        for alias in databases
+    )
+    query = f'''
+        SELECT value, COUNT(DISTINCT paper_id) AS papers FROM (
+        {arms}
+        )
+        GROUP BY value
+        ORDER BY papers DESC, value
+        LIMIT ?
+    '''
+    with read_connection(databases) as conn:
+        results = conn.execute(query, [start_date, end_date] * len(databases) + [limit]).fetchall()
+    return results
+
+
+def _first(expressions):
+    # COALESCE needs at least two arguments
+    return expressions[0] if len(expressions) == 1 else f"COALESCE({', '.join(expressions)})"
+
+
+def daily_counts(databases, start_date, end_date):
+    # [(day, papers)] in day order; across several topics a paper stored in
+    # more than one of them counts once
+    schema = INDEX_ALIAS if len(databases) > 1 else next(iter(databases))
+    query = f"SELECT day, n FROM {schema}.daily_counts WHERE day BETWEEN ? AND ? AND n > 0 ORDER BY day"
+    with read_connection(databases) as conn:
+        results = conn.execute(query, (start_date, end_date)).fetchall()
+    return results
+
+
+def _page_details(databases, page_columns=""):
+    # PageRow columns for the keys in the `page` CTE, with `updated` and the
+    # card taken from whichever topics hold each paper
+    aliases = list(databases)
+    joins = "\n".join(
+        f"LEFT JOIN {alias}.arxiv_papers t{i} ON t{i}.id = page.id\n"
+        f"LEFT JOIN {alias}.paper_cards c{i} ON c{i}.id = page.id AND c{i}.template_version = {TEMPLATE_VERSION}"
+        for i, alias in enumerate(aliases)
+    )
+    topics = " || ".join(
+        f"CASE WHEN t{i}.id IS NOT NULL THEN '{alias},' ELSE '' END" for i, alias in enumerate(aliases)
+    )
+    return f'''
+        SELECT page.id, page.published, {_first([f't{i}.updated' for i in range(len(aliases))])},
+               rtrim({topics}, ','), {_first([f'c{i}.html' for i in range(len(aliases))])}{page_columns}
+        FROM page
+        {joins}
+    '''
+
+
+def query_papers(databases, start_date, end_date, limit=10, offset=0, after=None, facets=None):
+    query = f'''
+        WITH page AS (
+        {_keys_query(databases, after, facets)}
+        ORDER BY published_day DESC, published DESC, id DESC
+        LIMIT ? OFFSET ?
+        )
+        {_page_details(databases)}
+        ORDER BY page.published_day DESC, page.published DESC, page.id DESC
+    '''
+    params = _keys_params(databases, start_date, end_date, after, facets) + [limit, offset]
+
+    with read_connection(databases) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = page_row
+        results = cursor.execute(query, params).fetchall()
+    return results
+
+
+def paper_details(databases, ids):
+    # Full PAPER_COLUMNS + id rows for the given papers, from whichever topic
+    # holds each; only needed to render papers that have no stored card
+    placeholders = ', '.join('?' for _ in ids)
+    arms = "\n        UNION ALL\n        ".join(
+        f"SELECT {', '.join(PAPER_COLUMNS)}, id FROM {alias}.arxiv_papers WHERE id IN ({placeholders})"
+        for alias in databases
+    )
+    with read_connection(databases) as conn:
+        rows = conn.execute(arms, list(ids) * len(databases)).fetchall()
+    return {row[7]: row for row in rows}
+
+
+def _matches_query(databases, facets=None, query=fulltext.matches_query):
+    return "\n        UNION ALL\n        ".join(
+        query(alias) + facet_filter(alias, facets or {}, 'p.id') for alias in databases
+    )
+
+
+def _matches_params(databases, keywords, start_date, end_date, facets=None):
+    params = [fulltext.match_expression(keywords), start_date, end_date]
+    return (params + facet_params(facets or {}, start_date, end_date)) * len(databases)
+
+
+def count_matches(databases, keywords, start_date, end_date, facets=None):
+    # Ids only: no rank or snippet is computed for a count
+    query = f'''
+        SELECT COUNT(DISTINCT id) FROM (
+        {_matches_query(databases, facets)}
+        )
+    '''
+    params = _matches_params(databases, keywords, start_date, end_date, facets)
+    with read_connection(databases) as conn:
+        total = conn.execute(query, params).fetchone()[0]
+    return total
+
+
+def search_papers(databases, keywords, start_date, end_date, limit=10, offset=0, facets=None):
+    # bm25 is computed per topic index; a paper found in several topics keeps
+    # its best rank (SQLite's bare-column MIN rule picks that row's source and
+    # rowid). MATERIALIZED keeps a single topic's hits from being flattened into
+    # the GROUP BY, where bm25() cannot run. Snippets are built afterwards for
+    # the page's rows only; id breaks rank ties so offset pages are stable.
+    query = f'''
+        WITH hits AS MATERIALIZED (
+        {_matches_query(databases, facets, fulltext.ranked_query)}
+        ), page AS (
+        SELECT id, published_day, published, MIN(rank) AS rank, source, hit_rowid
+        FROM hits
+        GROUP BY id
+        ORDER BY rank, id
+        LIMIT ? OFFSET ?
+        )
+        {_page_details(databases, ", page.source, page.hit_rowid")}
+        ORDER BY page.rank, page.id
+    '''
+    params = _matches_params(databases, keywords, start_date, end_date, facets) + [limit, offset]
+    expression = fulltext.match_expression(keywords)
+
+    with read_connection(databases) as conn:
+        rows = conn.execute(query, params).fetchall()
+        results = [
+            PageRow(*row[:5], match=conn.execute(fulltext.snippet_query(row[5]), (expression, row[6])).fetchone()[0])
+            for row in rows
+        ]
+    return results
@@ -0,0 +1,112 @@
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from utils.db import get_meta, set_meta
+
+EXPORT_COLUMNS = [
+    'id', 'updated', 'published', 'title', 'summary', 'authors', 'affiliations', 'doi', 'comment',
+    'journal_ref', 'primary_category', 'categories', 'link_alternate', 'link_pdf', 'generated_summary',
+    'published_day'
+]
+EXCEL_EXPORT_INTERVAL_SECONDS = 24 * 60 * 60
+# A daily cron job starting a little early still counts as a day later
+EXCEL_EXPORT_SLACK_SECONDS = 15 * 60
+PARQUET_BATCH_SIZE = 5000
+
+
+def last_rowid(conn):
+    return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM arxiv_papers").fetchone()[0]
+
+
+def export_excel(conn, excel_filename, force=False):
+    # openpyxl always rewrites the whole workbook, so refresh it at most once per
+    # interval. The interval runs from when the last export started (kept in
+    # schema_meta), not from the workbook's mtime, which is set minutes later
+    # when it finishes and would make the next day's run skip.
+    started = time.time()
+    last_started = get_meta(conn, 'excel_export_started')
+    if not force and last_started is not None and os.path.exists(excel_filename):
+        if started - last_started < EXCEL_EXPORT_INTERVAL_SECONDS - EXCEL_EXPORT_SLACK_SECONDS:
+            return False
+
+    full_df = pd.read_sql_query("SELECT * FROM arxiv_papers", conn)
+    tmp_filename = excel_filename[:-len('.xlsx')] + '.tmp.xlsx'
+    full_df.to_excel(tmp_filename, index=False)
+    os.replace(tmp_filename, excel_filename)
+    with conn:
+        set_meta(conn, 'excel_export_started', started)
+    return True
+
+
+def _write_part(cursor, schema, part):
+    # Streams the cursor's rows into one part file, renamed into place when complete
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_part = part.with_suffix('.tmp')
+    written = 0
+    writer = None
+    try:
+        while True:
+            rows = cursor.fetchmany(PARQUET_BATCH_SIZE)
+            if not rows:
+                break
+            if writer is None:
+                part.parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(tmp_part, schema)
+            columns = [[None if value is None else str(value) for value in column] for column in zip(*rows)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            written += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        os.replace(tmp_part, part)
+    return written
+
+
+def export_parquet(conn, parquet_dir, after_rowid=0):
+    # Appends rows with rowid > after_rowid as a new part file. Read the directory
+    # with pyarrow.dataset or pd.read_parquet(parquet_dir, memory_map=True).
+    # Papers updated in place to a newer arXiv version (logged in paper_versions)
+    # are appended as their own part, with a _removed-*.parquet tombstone listing
+    # the ids they replace; readers drop rows with those ids. Dataset readers skip
+    # files starting with '_', so tombstones never show up as papers.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed; skipping Parquet export.")
+        return 0
+
+    directory = Path(parquet_dir)
+    if not any(directory.glob('part-*.parquet')):
+        # First export of this database is a full snapshot
+        after_rowid = 0
+
+    schema = pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS])
+    pending = "SELECT new_id FROM paper_versions WHERE exported = 0"
+    cursor = conn.execute(f'''
+        SELECT {', '.join(EXPORT_COLUMNS)} FROM arxiv_papers
+        WHERE rowid > ? AND id NOT IN ({pending}) ORDER BY rowid
+    ''', (after_rowid,))
+    written = _write_part(cursor, schema, directory / f"part-{after_rowid + 1:012d}.parquet")
+
+    versions = conn.execute("SELECT rowid, old_id FROM paper_versions WHERE exported = 0 ORDER BY rowid").fetchall()
+    if versions:
+        last_version = versions[-1][0]
+        cursor = conn.execute(f'''
+            SELECT {', '.join(EXPORT_COLUMNS)} FROM arxiv_papers
+            WHERE id IN ({pending}) ORDER BY rowid
+        ''')
+        written += _write_part(cursor, schema, directory / f"part-v{last_version:012d}.parquet")
+        tombstones = pa.table({'id': [old_id for _, old_id in versions]}, schema=pa.schema([('id', pa.string())]))
+        tmp_removed = directory / f"_removed-v{last_version:012d}.tmp"
+        pq.write_table(tombstones, tmp_removed)
+        os.replace(tmp_removed, directory / f"_removed-v{last_version:012d}.parquet")
+        with conn:
+            conn.execute("UPDATE paper_versions SET exported = 1 WHERE exported = 0 AND rowid <= ?", (last_version,))
+    return written
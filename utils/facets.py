@@ -0,0 +1,84 @@
+from utils.rowids import only_rowids, rowid_params
+
+# Authors and arXiv categories are stored as comma-separated TEXT. At ingest
+# they are split into paper_authors / paper_categories (see utils.db), so a
+# facet count or filter is an index range scan instead of a LIKE over every row.
+
+# facet -> (table, value column)
+FACETS = {
+    'author': ('paper_authors', 'author'),
+    'category': ('paper_categories', 'category'),
+}
+FACET_LIMIT = 20
+
+
+def split_list(value):
+    # "cs.CV, cs.AI" -> ['cs.CV', 'cs.AI'], without blanks or repeats
+    return list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+
+
+def fill_facets(conn, after_rowid=0, batch_size=1000, rowids=None):
+    # Splits the authors and categories of every paper (with rowid > after_rowid,
+    # or among `rowids`) that has no facet rows yet
+    filled = 0
+    last_rowid = after_rowid
+    while True:
+        rows = conn.execute(f'''
+            SELECT rowid, id, published_day, authors, categories
+            FROM arxiv_papers
+            WHERE rowid > ?
+              AND NOT EXISTS (SELECT 1 FROM paper_authors a WHERE a.paper_id = arxiv_papers.id)
+              AND NOT EXISTS (SELECT 1 FROM paper_categories c WHERE c.paper_id = arxiv_papers.id){only_rowids(rowids)}
+            ORDER BY rowid
+            LIMIT ?
+        ''', (last_rowid, *rowid_params(rowids), batch_size)).fetchall()
+        if not rows:
+            return filled
+        conn.executemany(
+            "INSERT OR IGNORE INTO paper_authors (author, published_day, paper_id) VALUES (?, ?, ?)",
+            [(author, day, paper_id) for _, paper_id, day, authors, _ in rows for author in split_list(authors)]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO paper_categories (category, published_day, paper_id) VALUES (?, ?, ?)",
+            [(category, day, paper_id) for _, paper_id, day, _, categories in rows
+             for category in split_list(categories)]
+        )
+        filled += len(rows)
+        last_rowid = rows[-1][0]
+
+
+def facet_filter(schema, facets, id_column='id'):
+    # SQL conditions keeping only papers that have every value in `facets`
+    # ({'author': ..., 'category': ...}); parameters come from facet_params
+    return ''.join(
+        f" AND {id_column} IN (SELECT paper_id FROM {schema}.{FACETS[facet][0]}"
+        f" WHERE {FACETS[facet][1]} = ? AND published_day BETWEEN ? AND ?)"
+        for facet in facets
+    )
+
+
+def facet_params(facets, start_date, end_date):
+    params = []
+    for value in facets.values():
+        params.extend([value, start_date, end_date])
+    return params
+
+
+def any_facet_filter(schemas, facets, id_column='id'):
+    # As facet_filter, for papers whose facet rows may be in any of `schemas`
+    # (a cross-topic query); parameters come from any_facet_params
+    return ''.join(
+        " AND (" + " OR ".join(
+            f"{id_column} IN (SELECT paper_id FROM {schema}.{FACETS[facet][0]}"
+            f" WHERE {FACETS[facet][1]} = ? AND published_day BETWEEN ? AND ?)"
+            for schema in schemas
+        ) + ")"
+        for facet in facets
+    )
+
+
+def any_facet_params(schemas, facets, start_date, end_date):
+    params = []
+    for value in facets.values():
+        params.extend([value, start_date, end_date] * len(schemas))
+    return params
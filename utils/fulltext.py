@@ -0,0 +1,51 @@
+import re
+
+# Keyword search over title, summary and generated_summary through the
+# arxiv_papers_fts index created by utils.db.ensure_schema.
+
+SNIPPET_TOKENS = 24
+# bm25 column weights: a hit in the title counts most, the generated summary least
+BM25_WEIGHTS = '10.0, 2.0, 1.0'
+
+
+def normalize_keywords(keywords):
+    # Keeps only word characters; '' means "no keyword filter"
+    return ' '.join(re.findall(r'\w+', keywords or ''))
+
+
+def match_expression(keywords):
+    # Every word becomes a quoted FTS5 string (implicitly ANDed), so user input
+    # can never be parsed as query syntax
+    return ' '.join(f'"{word}"' for word in normalize_keywords(keywords).split())
+
+
+def matches_query(schema='main'):
+    # Rows: id of every hit in one database, for counts
+    return f'''
+        SELECT p.id
+        FROM {schema}.arxiv_papers_fts f
+        JOIN {schema}.arxiv_papers p ON p.rowid = f.rowid
+        WHERE f.arxiv_papers_fts MATCH ? AND p.published_day BETWEEN ? AND ?
+    '''
+
+
+def ranked_query(schema='main'):
+    # Rows: id, published_day, published, rank, schema and rowid of every hit in
+    # one database. Snippets are left to snippet_query for the page's rows only.
+    return f'''
+        SELECT p.id, p.published_day, p.published,
+               bm25(f.arxiv_papers_fts, {BM25_WEIGHTS}) AS rank,
+               '{schema}' AS source, f.rowid AS hit_rowid
+        FROM {schema}.arxiv_papers_fts f
+        JOIN {schema}.arxiv_papers p ON p.rowid = f.rowid
+        WHERE f.arxiv_papers_fts MATCH ? AND p.published_day BETWEEN ? AND ?
+    '''
+
+
+def snippet_query(schema='main'):
+    # The highlighted snippet of one hit, looked up by rowid with the MATCH repeated
+    return f'''
+        SELECT snippet(arxiv_papers_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})
+        FROM {schema}.arxiv_papers_fts
+        WHERE arxiv_papers_fts MATCH ? AND rowid = ?
+    '''
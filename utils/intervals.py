@@ -0,0 +1,114 @@
+import bisect
+import json
+import os
+from datetime import datetime
+
+# arxiv_*_intervals.json records, per search term, the {start, end} windows that
+# have already been fetched. The ledger is loaded into IntervalSets so coverage
+# lookups are a binary search over merged, non-overlapping windows.
+
+
+class IntervalSet:
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in intervals:
+            self.add(start, end)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def add(self, start, end):
+        # Merge with every window that overlaps or touches [start, end]
+        i = bisect.bisect_left(self.ends, start)
+        j = bisect.bisect_right(self.starts, end)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def covers(self, moment):
+        i = bisect.bisect_right(self.starts, moment) - 1
+        return i >= 0 and self.ends[i] >= moment
+
+    def missing(self, start, end):
+        # Sub-ranges of [start, end] not covered by any window
+        gaps = []
+        cursor = start
+        i = bisect.bisect_left(self.ends, start)
+        while i < len(self.starts) and self.starts[i] <= end:
+            if self.starts[i] > cursor:
+                gaps.append((cursor, self.starts[i]))
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def intersection(self, other):
+        result = IntervalSet()
+        i = j = 0
+        mine, theirs = list(self), list(other)
+        while i < len(mine) and j < len(theirs):
+            start = max(mine[i][0], theirs[j][0])
+            end = min(mine[i][1], theirs[j][1])
+            if start <= end:
+                result.add(start, end)
+            if mine[i][1] < theirs[j][1]:
+                i += 1
+            else:
+                j += 1
+        return result
+
+
+def load_ledger(filename):
+    try:
+        with open(filename) as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {
+        term: IntervalSet(
+            (datetime.fromisoformat(window['start']), datetime.fromisoformat(window['end']))
+            for window in windows
+        )
+        for term, windows in raw.items()
+    }
+
+
+def save_ledger(filename, ledger):
+    # Written to a temporary file and renamed, so readers never see a partial ledger
+    raw = {
+        term: [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in intervals]
+        for term, intervals in ledger.items()
+    }
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(raw, f, indent=4)
+    os.replace(tmp_filename, filename)
+
+
+def coverage(ledger, terms=None):
+    # A moment counts as fetched only once every search term has fetched it
+    terms = list(ledger) if terms is None else terms
+    if not terms or any(term not in ledger for term in terms):
+        return IntervalSet()
+    covered = ledger[terms[0]]
+    for term in terms[1:]:
+        covered = covered.intersection(ledger[term])
+    return covered
+
+
+def record_window(filename, start, end, terms=None):
+    ledger = load_ledger(filename)
+    for term in (terms or list(ledger)):
+        ledger.setdefault(term, IntervalSet()).add(start, end)
+    save_ledger(filename, ledger)
+
+
+def missing_windows(filename, start, end, terms=None):
+    return coverage(load_ledger(filename), terms).missing(start, end)
@@ -0,0 +1,138 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Request timing, row and cache counters in Prometheus text format, served on
+# a local port next to the Gradio app. Off unless PAPER_METRICS_PORT is set;
+# when off, @timed returns the function untouched and the counters return
+# after one flag check.
+
+METRICS_PORT = os.environ.get('PAPER_METRICS_PORT')
+METRICS_HOST = os.environ.get('PAPER_METRICS_HOST', '127.0.0.1')
+ENABLED = bool(METRICS_PORT)
+PREFIX = 'paper_aggregator'
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'operation_seconds': ('histogram', "Time spent per operation and topic ('all' for the All tab)."),
+    'rows_total': ('counter', "Rows returned by page queries and rows matched by counts."),
+    'cache_requests_total': ('counter', "Result cache lookups by outcome."),
+}
+
+_lock = threading.Lock()
+# (name, labels) -> [bucket counts..., +Inf count, sum]
+_histograms = {}
+# (name, labels) -> value
+_counters = {}
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+def increment(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def timed(operation):
+    # For PaperSearch methods: records operation_seconds labelled with self.name
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(self, *args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(self, *args, **kwargs)
+                finally:
+                    observe('operation_seconds', time.perf_counter() - started, operation=operation, topic=self.name)
+        else:
+            @functools.wraps(fn)
+            def wrapper(self, *args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(self, *args, **kwargs)
+                finally:
+                    observe('operation_seconds', time.perf_counter() - started, operation=operation, topic=self.name)
+        return wrapper
+    return decorate
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def render():
+    with _lock:
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for name, (kind, description) in HELP.items():
+        lines.append(f'# HELP {PREFIX}_{name} {description}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+        if kind == 'histogram':
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f'{PREFIX}_{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{PREFIX}_{name}_sum{_format_labels(labels)} {values[-1]}')
+                lines.append(f'{PREFIX}_{name}_count{_format_labels(labels)} {cumulative}')
+        else:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{PREFIX}_{name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood the app log
+        pass
+
+
+def serve():
+    # Starts the /metrics endpoint in a daemon thread when enabled
+    if not ENABLED:
+        return None
+    server = ThreadingHTTPServer((METRICS_HOST, int(METRICS_PORT)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
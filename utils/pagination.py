@@ -0,0 +1,37 @@
+PAGE_SIZE = 10
+
+# A page token remembers, for one date range (and set of facet filters), the
+# (published, id) key of the last row on every page already rendered. Later
+# pages seek past the nearest remembered key instead of making SQLite walk and
+# discard OFFSET rows. The scope includes the database generation: after an
+# ingest the remembered keys no longer end the same pages, so the token is
+# discarded rather than used to seek.
+
+
+def token_scope(start_date, end_date, filters=None, generation=None):
+    scope = [start_date, end_date] + [f'{name}={value}' for name, value in (filters or {}).items()]
+    return scope + [list(generation or [])]
+
+
+def new_token(start_date, end_date, filters=None, generation=None):
+    return {'range': token_scope(start_date, end_date, filters, generation), 'pages': {}}
+
+
+def seek_position(token, start_date, end_date, page, filters=None, generation=None):
+    offset = (page - 1) * PAGE_SIZE
+    if not token or token['range'] != token_scope(start_date, end_date, filters, generation):
+        return None, offset
+
+    seen = [p for p in token['pages'] if p < page]
+    if not seen:
+        return None, offset
+    nearest = max(seen)
+    return tuple(token['pages'][nearest]), (page - 1 - nearest) * PAGE_SIZE
+
+
+def remember_page(token, start_date, end_date, page, last_key, filters=None, generation=None):
+    if not token or token['range'] != token_scope(start_date, end_date, filters, generation):
+        token = new_token(start_date, end_date, filters, generation)
+    if last_key is not None:
+        token['pages'][page] = list(last_key)
+    return token
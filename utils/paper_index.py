@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+from utils.db import bump_generation, daily_counts_sql, migrate_once
+from utils.duplicates import base_id
+
+# The cross-topic id index: one row per distinct arXiv paper across all topic
+# databases, keyed by its id without the version suffix and holding the newest
+# version any topic has stored, plus the topics holding it. The All tab counts
+# and pages over `papers` directly, so a paper stored in several topics is a
+# single row instead of something every query de-duplicates with a UNION.
+#
+# sync_index applies each topic's paper_changes feed (see utils.db) past the
+# change_id it last applied: every paper named there is looked up again in all
+# topics, so inserts, new versions updated in place and deletions all land.
+# A topic seen for the first time is read in full. PRAGMA user_version is
+# bumped so cached All-tab results keyed on the generation are dropped.
+
+INDEX_FILENAME = 'arxiv_index_database.db'
+BUSY_TIMEOUT_SECONDS = 60
+
+CREATE_INDEX_DB_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS papers (
+        base_id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
+        updated TEXT,
+        published_day TEXT,
+        published TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_papers_published_day ON papers (published_day, published, id)",
+    '''
+    CREATE TABLE IF NOT EXISTS paper_topics (
+        base_id TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        PRIMARY KEY (base_id, topic)
+    ) WITHOUT ROWID
+    ''',
+    # Last paper_changes entry applied from each topic database
+    '''
+    CREATE TABLE IF NOT EXISTS indexed_topics (
+        topic TEXT PRIMARY KEY,
+        last_change INTEGER NOT NULL
+    )
+    ''',
+] + daily_counts_sql('papers')
+INDEX_TABLES = ['papers', 'paper_topics', 'indexed_topics', 'daily_counts']
+
+# Upserts (base_id, id, updated, published_day, published) rows, keeping the newest version
+UPSERT_PAPERS_SQL = '''
+    INSERT INTO papers (base_id, id, updated, published_day, published)
+    {select}
+    ON CONFLICT (base_id) DO UPDATE SET
+        id = excluded.id, updated = excluded.updated,
+        published_day = excluded.published_day, published = excluded.published
+    WHERE excluded.updated > papers.updated
+'''
+
+
+def index_filename(databases):
+    # Kept beside the topic databases it indexes
+    return os.path.join(os.path.dirname(next(iter(databases.values()))), INDEX_FILENAME)
+
+
+def _outdated(conn):
+    # Built before papers were keyed by base_id or topics tracked by change feed
+    papers = {row[1] for row in conn.execute("PRAGMA table_info(papers)")}
+    topics = {row[1] for row in conn.execute("PRAGMA table_info(indexed_topics)")}
+    return bool(papers) and ('base_id' not in papers or 'last_change' not in topics)
+
+
+def open_index(filename):
+    conn = sqlite3.connect(filename, timeout=BUSY_TIMEOUT_SECONDS)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.create_function('base_id', 1, base_id, deterministic=True)
+    # The index is derived data, so an older layout is dropped and rebuilt by the next sync
+    if _outdated(conn):
+        for table in INDEX_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+    for statement in CREATE_INDEX_DB_SQL:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def _index_topic(conn, alias):
+    # First sync of a topic: every paper it holds
+    conn.execute(UPSERT_PAPERS_SQL.format(select=f'''
+        SELECT base_id(id), id, updated, published_day, published FROM {alias}.arxiv_papers WHERE true
+    '''))
+    conn.execute(f"INSERT OR IGNORE INTO paper_topics (base_id, topic) SELECT base_id(id), ? FROM {alias}.arxiv_papers",
+                 (alias,))
+
+
+def _reindex(conn, databases):
+    # Rebuilds the index rows of every paper in temp.changed from all topics
+    conn.execute("DELETE FROM papers WHERE base_id IN (SELECT base_id FROM temp.changed)")
+    conn.execute("DELETE FROM paper_topics WHERE base_id IN (SELECT base_id FROM temp.changed)")
+    for alias in databases:
+        # Versions of a paper are its base id itself or base id + 'v<n>', both
+        # found through the topic's id index; CROSS JOIN keeps `changed` outermost
+        versions = f'''
+            FROM temp.changed c CROSS JOIN {alias}.arxiv_papers p
+            ON p.id = c.base_id OR (p.id > c.base_id || 'v' AND p.id < c.base_id || 'w')
+            WHERE base_id(p.id) = c.base_id
+        '''
+        conn.execute(UPSERT_PAPERS_SQL.format(
+            select=f"SELECT c.base_id, p.id, p.updated, p.published_day, p.published {versions}"
+        ))
+        conn.execute(f"INSERT OR IGNORE INTO paper_topics (base_id, topic) SELECT c.base_id, ? {versions}", (alias,))
+
+
+def sync_index(databases):
+    # Brings the index for `databases` (alias -> filename) up to date and
+    # returns how many papers were added or changed. An index built for a
+    # different set of topics is emptied and rebuilt.
+    conn = open_index(index_filename(databases))
+    try:
+        for alias, filename in databases.items():
+            migrate_once(filename)
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (filename,))
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed (base_id TEXT PRIMARY KEY)")
+        with conn:
+            applied = dict(conn.execute("SELECT topic, last_change FROM indexed_topics"))
+            if set(applied) - set(databases):
+                for table in INDEX_TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                applied = {}
+
+            synced = 0
+            latest = {}
+            for alias in databases:
+                latest[alias] = conn.execute(
+                    f"SELECT COALESCE(MAX(change_id), 0) FROM {alias}.paper_changes"
+                ).fetchone()[0]
+                if alias not in applied:
+                    _index_topic(conn, alias)
+                    synced += conn.execute(f"SELECT COUNT(*) FROM {alias}.arxiv_papers").fetchone()[0]
+                else:
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO temp.changed (base_id)
+                        SELECT base_id(paper_id) FROM {alias}.paper_changes WHERE change_id > ? AND change_id <= ?
+                    ''', (applied[alias], latest[alias]))
+            changed = conn.execute("SELECT COUNT(*) FROM temp.changed").fetchone()[0]
+            if changed:
+                _reindex(conn, databases)
+            conn.execute("DELETE FROM temp.changed")
+
+            for alias in databases:
+                conn.execute('''
+                    INSERT INTO indexed_topics (topic, last_change) VALUES (?, ?)
+                    ON CONFLICT (topic) DO UPDATE SET last_change = excluded.last_change
+                ''', (alias, latest[alias]))
+                # Applied changes are not needed again: a new index reads topics in full
+                conn.execute(f"DELETE FROM {alias}.paper_changes WHERE change_id <= ?", (latest[alias],))
+            if synced or changed or not applied:
+                bump_generation(conn)
+        return synced + changed
+    finally:
+        conn.close()
+
+
+_synced = set()
+_synced_lock = threading.Lock()
+
+
+def sync_once(databases):
+    # The app catches the index up when it first opens a cross-topic view;
+    # afterwards each ingest keeps it current
+    key = tuple(sorted(databases.items()))
+    with _synced_lock:
+        if key not in _synced:
+            sync_index(databases)
+            _synced.add(key)
+    return index_filename(databases)
@@ -0,0 +1,122 @@
+from utils.cache import ResultCache
+from utils.rowids import only_rowids, rowid_params
+
+# Result cards are rendered once per paper and reused: save_data stores them in
+# paper_cards keyed by (id, template_version), and cards missing there are kept
+# in an in-process cache. Bump TEMPLATE_VERSION whenever the markup changes;
+# the next ingest drops the older cards and renders them again (utils.db.backfill).
+TEMPLATE_VERSION = 3
+
+# Per-request extras (topic tags, keyword snippets) are spliced in here
+EXTRA_SLOT = '<!--extra-->'
+
+# Shared by every card; passed to gr.Blocks(css=...) instead of repeating inline styles
+CARD_CSS = """
+.paper-card { display: flex; background: #f2f2f9; border: 2px solid #c4c4ff; padding: 15px;
+  margin-bottom: 20px; border-radius: 10px; font-family: 'Roboto', sans-serif; }
+.paper-card .paper-text { width: 65%; padding-right: 15px; }
+.paper-card h2 { color: #2a2a75; margin-bottom: 10px; font-size: 1.6em; }
+.paper-card h2 a { text-decoration: none; color: #2a2a75; }
+.paper-card p { margin-bottom: 6px; }
+.paper-card .paper-pdf { width: 35%; display: flex; justify-content: flex-end; }
+.paper-card .paper-pdf details { width: 85%; }
+.paper-card .paper-pdf summary { cursor: pointer; color: #6f42c1; text-align: right; margin-bottom: 6px; }
+.paper-card .paper-pdf details a { display: block; text-align: right; margin-bottom: 6px; }
+.paper-card iframe { width: 100%; height: 300px; border: 1px solid #ccc; border-radius: 8px; }
+.no-papers { font-family: 'Roboto', sans-serif; font-size: 1.2em; text-align: center; color: #555; margin-top: 40px; }
+.no-papers span { font-weight: 700; font-size: 2em; color: #6f42c1; }
+"""
+
+# Registered with demo.load(js=...). A card's PDF preview holds only a link and
+# the address in data-pdf; the iframe is created the first time the card's
+# <details> is opened, so rendering a page fetches no PDFs. `toggle` does not
+# bubble, hence the capturing listener on the document.
+CARD_JS = """
+() => {
+  if (window.paperPdfPreviews) return;
+  window.paperPdfPreviews = true;
+  document.addEventListener("toggle", (event) => {
+    const details = event.target;
+    if (!details.open || !details.dataset || !details.dataset.pdf || details.querySelector("iframe")) return;
+    const iframe = document.createElement("iframe");
+    iframe.src = details.dataset.pdf;
+    details.appendChild(iframe);
+  }, true);
+}
+"""
+
+EMPTY_HTML = '<p class="no-papers"><span>No</span> papers found for the selected date range.</p>'
+
+fragment_cache = ResultCache(maxsize=20000, ttl=24 * 60 * 60, name='fragments')
+
+
+def https(link):
+    return "https" + link[4:] if link and link.startswith("http:") else link
+
+
+def render_card(title, authors, published, summary, link_alt, link_pdf):
+    # The PDF is only fetched once its preview is opened (see CARD_JS), not for
+    # every card on the page
+    if link_pdf:
+        pdf_html = (
+            f'<details data-pdf="{https(link_pdf)}"><summary>Preview PDF</summary>'
+            f'<a href="{https(link_pdf)}" target="_blank">Open PDF</a></details>'
+        )
+    else:
+        pdf_html = "<p>No PDF Available</p>"
+    return (
+        f'<div class="paper-card"><div class="paper-text">'
+        f'<h2><a href="{https(link_alt)}" target="_blank">{title}</a></h2>'
+        f'<p><strong>Authors:</strong> {authors}</p>'
+        f'<p><strong>Submitted:</strong> {published[:10]}</p>'
+        f'{EXTRA_SLOT}'
+        f'<p><strong>Summary:</strong> {summary}</p>'
+        f'</div><div class="paper-pdf">{pdf_html}</div></div>'
+    )
+
+
+def cached_card(paper_id, updated):
+    return fragment_cache.get((paper_id, updated, TEMPLATE_VERSION))
+
+
+def paper_card(row):
+    # row is (title, authors, published, updated, generated_summary, link_alternate, link_pdf, id)
+    title, authors, published, updated, summary, link_alt, link_pdf, paper_id = row[:8]
+    return fragment_cache.get_or_compute(
+        (paper_id, updated, TEMPLATE_VERSION),
+        lambda: render_card(title, authors, published, summary, link_alt, link_pdf)
+    )
+
+
+def with_extras(card, extras=''):
+    # A paper no topic holds any more has no card and is left out of the page
+    if card is None:
+        return ''
+    return card.replace(EXTRA_SLOT, extras, 1) if extras else card
+
+
+def extra_line(label, value):
+    return f'<p><strong>{label}:</strong> {value}</p>'
+
+
+def fill_cards(conn, after_rowid=0, batch_size=1000, rowids=None):
+    # Renders a card for every paper (with rowid > after_rowid, or among
+    # `rowids`) that has none at the current template version
+    filled = 0
+    last_rowid = after_rowid
+    while True:
+        rows = conn.execute(f'''
+            SELECT rowid, id, title, authors, published, generated_summary, link_alternate, link_pdf
+            FROM arxiv_papers
+            WHERE rowid > ? AND NOT EXISTS (SELECT 1 FROM paper_cards c WHERE c.id = arxiv_papers.id){only_rowids(rowids)}
+            ORDER BY rowid
+            LIMIT ?
+        ''', (last_rowid, *rowid_params(rowids), batch_size)).fetchall()
+        if not rows:
+            return filled
+        conn.executemany(
+            "INSERT OR REPLACE INTO paper_cards (id, template_version, html) VALUES (?, ?, ?)",
+            [(row[1], TEMPLATE_VERSION, render_card(*row[2:])) for row in rows]
+        )
+        filled += len(rows)
+        last_rowid = rows[-1][0]
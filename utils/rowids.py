@@ -0,0 +1,13 @@
+import json
+
+# The fill_* functions normally pick up new papers by rowid > after_rowid; a
+# paper updated in place keeps its rowid, so ingest passes those rowids explicitly.
+
+
+def only_rowids(rowids, column='rowid'):
+    # SQL condition for the query's rowid params; empty when rowids is None
+    return f" AND {column} IN (SELECT value FROM json_each(?))" if rowids is not None else ""
+
+
+def rowid_params(rowids):
+    return [json.dumps(list(rowids))] if rowids is not None else []
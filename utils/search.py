@@ -0,0 +1,227 @@
+import asyncio
+import functools
+import gradio as gr
+from concurrent.futures import ThreadPoolExecutor
+from utils import engine, fulltext, metrics, snapshots
+from utils.cache import results_cache
+from utils.db import POOL_SIZE
+from utils.pagination import PAGE_SIZE, remember_page, seek_position
+from utils.render import EMPTY_HTML, cached_card, extra_line, paper_card, with_extras
+from utils.topics import TOPICS
+
+# Query, render and Gradio handlers shared by every tab. A topic tab searches
+# its own database and the All tab every registered one, both through
+# utils.engine, so pooling, caching and indexing live in one place.
+
+TOPIC_TAGS = {t.name: t.tag for t in TOPICS}
+
+# The handlers are async: blocking SQLite work runs on this bounded pool, never
+# on Gradio's event loop. One thread per pooled connection keeps a burst of
+# requests from opening connections beyond the pool.
+QUERY_WORKERS = POOL_SIZE
+query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix='query')
+
+
+async def run_query(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(query_executor, functools.partial(fn, *args, **kwargs))
+
+
+class PaperSearch:
+    def __init__(self, name, databases, tag_topics=False):
+        # name keys the result cache; databases maps alias -> filename
+        self.name = name
+        self.databases = databases
+        self.tag_topics = tag_topics
+
+    def generation(self):
+        return engine.generation(self.databases)
+
+    @metrics.timed('count_papers')
+    def count_papers(self, start_date, end_date, facets=None):
+        total = engine.count_papers(self.databases, start_date, end_date, facets)
+        metrics.increment('rows_total', total, operation='count_papers', topic=self.name, kind='matched')
+        return total
+
+    @metrics.timed('query_papers')
+    def query_papers(self, start_date, end_date, limit=10, offset=0, after=None, facets=None):
+        rows = engine.query_papers(
+            self.databases, start_date, end_date, limit=limit, offset=offset, after=after, facets=facets
+        )
+        metrics.increment('rows_total', len(rows), operation='query_papers', topic=self.name, kind='returned')
+        return rows
+
+    @metrics.timed('daily_counts')
+    def daily_counts(self, start_date, end_date):
+        # Papers per day for a trend view; served from the daily_counts rollups
+        key = ('daily', self.name, self.generation(), start_date, end_date)
+        return results_cache.get_or_compute(key, lambda: engine.daily_counts(self.databases, start_date, end_date))
+
+    @metrics.timed('facet_counts')
+    def facet_counts(self, facet, start_date, end_date):
+        # Most common authors or categories in the range, for facet pickers
+        key = ('facets', self.name, self.generation(), facet, start_date, end_date)
+        return results_cache.get_or_compute(
+            key, lambda: engine.facet_counts(self.databases, facet, start_date, end_date)
+        )
+
+    @metrics.timed('search_fulltext')
+    def search_fulltext(self, keywords, start_date, end_date, limit=10, offset=0, facets=None):
+        rows = engine.search_papers(
+            self.databases, keywords, start_date, end_date, limit=limit, offset=offset, facets=facets
+        )
+        metrics.increment('rows_total', len(rows), operation='search_fulltext', topic=self.name, kind='returned')
+        return rows
+
+    @metrics.timed('count_fulltext')
+    def count_fulltext(self, keywords, start_date, end_date, facets=None):
+        total = engine.count_matches(self.databases, keywords, start_date, end_date, facets)
+        metrics.increment('rows_total', total, operation='count_fulltext', topic=self.name, kind='matched')
+        return total
+
+    def extras(self, paper):
+        html = topic_tags(paper.topics) if self.tag_topics else ''
+        if paper.match is not None:
+            html += extra_line('Match', paper.match)
+        return html
+
+    def cards(self, papers):
+        # id -> card. Stored and recently rendered cards need no text columns;
+        # only the rest are loaded and rendered
+        cards = {paper.id: paper.card or cached_card(paper.id, paper.updated) for paper in papers}
+        missing = [paper_id for paper_id, card in cards.items() if card is None]
+        if missing:
+            for paper_id, row in engine.paper_details(self.databases, missing).items():
+                cards[paper_id] = paper_card(row)
+        return cards
+
+    @metrics.timed('render_page')
+    def render_page(self, start_date, end_date, page, page_token=None, keywords='', facets=None, generation=None):
+        if keywords:
+            # Keyword hits are ordered by relevance, so they page by offset
+            offset = (page - 1) * PAGE_SIZE
+            papers = self.search_fulltext(
+                keywords, start_date, end_date, limit=PAGE_SIZE, offset=offset, facets=facets
+            )
+            last_key = None
+        else:
+            after, offset = seek_position(page_token, start_date, end_date, page, facets, generation)
+            papers = self.query_papers(
+                start_date, end_date, limit=PAGE_SIZE, offset=offset, after=after, facets=facets
+            )
+            last_key = (papers[-1].published, papers[-1].id) if papers else None
+        if not papers:
+            return EMPTY_HTML, last_key
+
+        # Cards are pre-rendered per paper; topic tags and keyword snippets vary per request
+        cards = self.cards(papers)
+        formatted_html = ''.join(with_extras(cards[paper.id], self.extras(paper)) for paper in papers)
+        return formatted_html, last_key
+
+    @metrics.timed('display_results')
+    def display_results(self, start_date, end_date, page, page_token=None, keywords='', facets=None):
+        # A token only seeks within the generation it was built in, so the cached
+        # page is the same whichever token computed it
+        generation = self.generation()
+        key = ('page', self.name, generation, start_date, end_date, page, keywords, facet_key(facets))
+        html, last_key = results_cache.get_or_compute(
+            key, lambda: self.render_page(start_date, end_date, page, page_token, keywords, facets, generation)
+        )
+        if keywords:
+            return html, page_token
+        return html, remember_page(page_token, start_date, end_date, page, last_key, facets, generation)
+
+    def total_results(self, start_date, end_date, keywords='', facets=None):
+        key = ('count', self.name, self.generation(), start_date, end_date, keywords, facet_key(facets))
+        if keywords:
+            return results_cache.get_or_compute(
+                key, lambda: self.count_fulltext(keywords, start_date, end_date, facets)
+            )
+        return results_cache.get_or_compute(key, lambda: self.count_papers(start_date, end_date, facets))
+
+    def landing(self, start_date, end_date):
+        # (total, html, page_token) from the pre-rendered snapshot, if it is current,
+        # or for the default window from one built here after the date rolled over
+        generation = self.generation()
+        view = snapshots.landing_view(self, start_date, end_date, generation)
+        if view is None:
+            return None
+        token = remember_page(None, start_date, end_date, 1, view['last_key'], generation=generation)
+        return view['total'], view['html'], token
+
+    @metrics.timed('on_page_change')
+    async def on_page_change(self, selected_page, start_date, end_date, page_token, keywords='', author='',
+                             category=''):
+        page = int(selected_page)
+        start_date_str = start_date.strftime('%Y-%m-%d')
+        end_date_str = end_date.strftime('%Y-%m-%d')
+        keywords = fulltext.normalize_keywords(keywords)
+        facets = facet_filters(author, category)
+        html, page_token = await run_query(
+            self.display_results, start_date_str, end_date_str, page, page_token, keywords, facets
+        )
+        return html, page_token
+
+    @metrics.timed('search_papers')
+    async def search_papers(self, start_date, end_date, keywords='', author='', category=''):
+        try:
+            # Convert to string format yyyy-mm-dd for DB queries
+            start_date_str = start_date.strftime('%Y-%m-%d')
+            end_date_str = end_date.strftime('%Y-%m-%d')
+        except Exception:
+            return gr.update(visible=False), "Invalid date format. Use YYYY-MM-DD.", "", gr.update(visible=False), None
+
+        keywords = fulltext.normalize_keywords(keywords)
+        facets = facet_filters(author, category)
+        landing = None if keywords or facets else await run_query(self.landing, start_date_str, end_date_str)
+        if landing:
+            total_results, html, page_token = landing
+        else:
+            # The count and the first page are independent queries, so they run side by side
+            total_results, (html, page_token) = await asyncio.gather(
+                run_query(self.total_results, start_date_str, end_date_str, keywords, facets),
+                run_query(self.display_results, start_date_str, end_date_str, 1, keywords=keywords, facets=facets),
+            )
+        if total_results == 0:
+            return gr.update(visible=False), "", html, gr.update(visible=False), page_token
+
+        max_pages = max((total_results + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+
+        return (
+            gr.update(visible=True),
+            f"Found {total_results} papers.",
+            html,
+            gr.update(visible=True, choices=[str(i) for i in range(1, max_pages + 1)], value="1"),
+            page_token
+        )
+
+
+def facet_filters(author='', category=''):
+    # The author / category boxes as engine facets; blank boxes do not filter
+    filters = {'author': (author or '').strip(), 'category': (category or '').strip()}
+    return {facet: value for facet, value in filters.items() if value}
+
+
+def facet_key(facets):
+    return tuple(sorted((facets or {}).items()))
+
+
+def topic_tags(topics):
+    # No line for a paper whose topics are unknown, e.g. one the index lists
+    # before every topic has stored its current version
+    tags = [TOPIC_TAGS[topic] for topic in (topics or '').split(',') if topic in TOPIC_TAGS]
+    return extra_line('Topics', ', '.join(tags)) if tags else ''
+
+
+def topic_search(topic):
+    return PaperSearch(topic.name, {topic.name: topic.files.db})
+
+
+def all_topics_search(topics=TOPICS):
+    # Papers found in several topics are returned once, tagged with each of them
+    return PaperSearch('all', {t.name: t.files.db for t in topics}, tag_topics=True)
+
+
+def tab_searches(topics=TOPICS):
+    # One per app tab, in tab order
+    return [topic_search(t) for t in topics] + [all_topics_search(topics)]
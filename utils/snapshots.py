@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+# Almost every visit lands on a tab's default window (the last DEFAULT_DAYS
+# days). After each ingest, build_snapshots pre-renders that window's first
+# page and count for every tab into one JSON file, swapped in atomically; the
+# app serves a landing search from it while the databases are still at the
+# generation it was built from. Once the date rolls over, the file holds
+# yesterday's window until the next ingest, so the app builds the new window's
+# view itself on the first landing (landing_view) and keeps it in memory.
+
+SNAPSHOT_FILENAME = 'arxiv_snapshots.json'
+DEFAULT_DAYS = 30
+
+_lock = threading.Lock()
+_loaded = {'mtime': None, 'views': {}}
+# name -> view built by the app for a default window the file does not hold
+_rolled = {}
+
+
+def default_window(today=None):
+    # Same window the app's calendars open with
+    today = today or datetime.now()
+    return (today - timedelta(days=DEFAULT_DAYS)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')
+
+
+def snapshot(search, start_date, end_date):
+    html, last_key = search.render_page(start_date, end_date, 1)
+    return {
+        'generation': list(search.generation()),
+        'start': start_date,
+        'end': end_date,
+        'total': search.total_results(start_date, end_date),
+        'html': html,
+        'last_key': last_key,
+    }
+
+
+def build_snapshots(searches, filename=SNAPSHOT_FILENAME, today=None):
+    start_date, end_date = default_window(today)
+    views = {search.name: snapshot(search, start_date, end_date) for search in searches}
+    # Written to a temporary file and renamed, so the app never reads a partial snapshot
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(views, f)
+    os.replace(tmp_filename, filename)
+    return views
+
+
+def load_snapshots(filename=SNAPSHOT_FILENAME):
+    # Re-read only when the file has been replaced since the last call
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _lock:
+        if _loaded['mtime'] != mtime:
+            try:
+                with open(filename) as f:
+                    _loaded['views'] = json.load(f)
+            except (OSError, ValueError):
+                _loaded['views'] = {}
+            _loaded['mtime'] = mtime
+        return _loaded['views']
+
+
+def find_snapshot(name, start_date, end_date, generation, filename=SNAPSHOT_FILENAME):
+    view = load_snapshots(filename).get(name)
+    if view is None or (view['start'], view['end']) != (start_date, end_date):
+        return None
+    # A newer ingest than the snapshot means it is stale
+    if view['generation'] != list(generation):
+        return None
+    return view
+
+
+def landing_view(search, start_date, end_date, generation, filename=SNAPSHOT_FILENAME):
+    view = find_snapshot(search.name, start_date, end_date, generation, filename)
+    if view is not None or (start_date, end_date) != default_window():
+        return view
+    with _lock:
+        view = _rolled.get(search.name)
+    if view is None or (view['start'], view['end'], view['generation']) != (start_date, end_date, list(generation)):
+        # Concurrent first landings may each build it; the views are identical
+        view = snapshot(search, start_date, end_date)
+        with _lock:
+            _rolled[search.name] = view
+    # An ingest between reading the generation and building the view makes it unusable here
+    return view if view['generation'] == list(generation) else None
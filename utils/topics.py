@@ -0,0 +1,29 @@
+from collections import namedtuple
+
+# The topic registry: every tab, the All tab, ingest and the shared query
+# engine are driven from TOPICS, so adding a topic is one entry here.
+
+# Every topic keeps its files side by side under the arxiv_<topic> prefix
+TopicFiles = namedtuple('TopicFiles', ['db', 'excel', 'intervals', 'parquet'])
+# name is also the topic's SQL alias in utils.engine, tab_id its ?tab= key and
+# tag the short label shown on All-tab results
+Topic = namedtuple('Topic', ['name', 'label', 'tab_id', 'tag', 'files'])
+
+
+def topic_files(topic):
+    prefix = f'arxiv_{topic}'
+    return TopicFiles(f'{prefix}_database.db', f'{prefix}_excel.xlsx', f'{prefix}_intervals.json', f'{prefix}_parquet')
+
+
+def topic(name, label, tab_id=None, tag=None):
+    return Topic(name, label, tab_id or name, tag or label, topic_files(name))
+
+
+# In tab order
+TOPICS = [
+    topic('wildfire', 'Wildfire prediction and forecasting using Deep learning', tag='Wildfire'),
+    topic('quantum', 'Quantum Computing', tab_id='quantum_computing'),
+    topic('ai', 'Artificial Intelligence'),
+    topic('web3', 'Web3 and Blockchain', tab_id='web3_blockchain'),
+]
+TOPICS_BY_NAME = {t.name: t for t in TOPICS}